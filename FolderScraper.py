@@ -1,556 +1,4541 @@
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import os
-import subprocess
-import platform
-from pathlib import Path
-import threading
-import time
-from collections import defaultdict
-
-
-class FolderScraperApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Folder Scraper")
-        self.root.geometry("1000x700")
-
-        # User-defined classification categories
-        self.classification_categories = []
-
-        # Variables
-        self.selected_folder = tk.StringVar()
-        self.search_keyword = tk.StringVar()
-        self.max_depth = tk.IntVar(value=10)  # Limit search depth
-        self.max_results = tk.IntVar(value=1000)  # Limit results
-
-        # Thread control
-        self.search_thread = None
-        self.stop_search = False
-        self.current_results = defaultdict(list)
-
-        # Settings file path
-        self.settings_file = os.path.join(
-            os.path.expanduser("~"), ".folder_scraper_settings.txt")
-
-        # Load saved default folder or set initial default
-        self.load_default_folder()
-
-        self.setup_ui()
-
-    def load_default_folder(self):
-        """Load the saved default folder from settings file"""
-        try:
-            if os.path.exists(self.settings_file):
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    if lines:
-                        saved_folder = lines[0].strip()
-                        if saved_folder and os.path.exists(saved_folder):
-                            self.selected_folder.set(saved_folder)
-                        
-                        # Load classification categories if they exist
-                        if len(lines) > 1:
-                            categories_line = lines[1].strip()
-                            if categories_line:
-                                self.classification_categories = [cat.strip() for cat in categories_line.split(',') if cat.strip()]
-                        return
-        except:
-            pass
-
-        # If no saved folder or file doesn't exist, use default
-        default_folder = r"C:\Users\kayo\OneDrive\Documents"  # Change this line
-        if os.path.exists(default_folder):
-            self.selected_folder.set(default_folder)
-        
-        # No default categories - start with empty list
-
-    def save_settings(self):
-        """Save the selected folder and classification categories for future use"""
-        try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                f.write(self.selected_folder.get() + '\n')
-                f.write(','.join(self.classification_categories) + '\n')
-        except:
-            pass  # Silently ignore save errors
-
-    def setup_ui(self):
-        # Set theme
-        style = ttk.Style()
-        style.theme_use('vista')  # or 'vista', 'xpnative', 'winnative'
-
-        # Main frame
-        main_frame = ttk.Frame(self.root, padding="20")
-        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-
-        # Configure grid weights
-        self.root.columnconfigure(0, weight=1)
-        self.root.rowconfigure(0, weight=1)
-        main_frame.columnconfigure(1, weight=1)
-        main_frame.rowconfigure(8, weight=1)
-
-        # Folder selection
-        ttk.Label(main_frame, text="Select Folder:", font=("Arial", 14)).grid(
-            row=0, column=0, sticky=tk.W, pady=(0, 10))
-
-        folder_frame = ttk.Frame(main_frame)
-        folder_frame.grid(row=0, column=1, sticky=(tk.W, tk.E), pady=(0, 10))
-        folder_frame.columnconfigure(0, weight=1)
-
-        self.folder_entry = ttk.Entry(
-            folder_frame, textvariable=self.selected_folder, font=("Arial", 12), state="readonly")
-        self.folder_entry.grid(
-            row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
-
-        ttk.Button(folder_frame, text="Browse",
-                   command=self.browse_folder).grid(row=0, column=1)
-
-        # Classification categories management
-        categories_frame = ttk.LabelFrame(main_frame, text="Classification Categories (Optional)", padding="10")
-        categories_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        categories_frame.columnconfigure(1, weight=1)
-
-        # Current categories display
-        ttk.Label(categories_frame, text="Current Categories:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
-        
-        self.categories_var = tk.StringVar()
-        self.update_categories_display()
-        categories_display = ttk.Entry(categories_frame, textvariable=self.categories_var, 
-                                     font=("Arial", 10), state="readonly")
-        categories_display.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10))
-
-        # Add category section
-        add_frame = ttk.Frame(categories_frame)
-        add_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
-        add_frame.columnconfigure(1, weight=1)
-
-        ttk.Label(add_frame, text="Add Category:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
-        
-        self.new_category_var = tk.StringVar()
-        self.category_entry = ttk.Entry(add_frame, textvariable=self.new_category_var, font=("Arial", 10))
-        self.category_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10))
-        self.category_entry.bind('<Return>', lambda e: self.add_category())
-
-        ttk.Button(add_frame, text="Add", command=self.add_category).grid(row=0, column=2, padx=(5, 10))
-        ttk.Button(add_frame, text="Clear All", command=self.clear_categories).grid(row=0, column=3, padx=(5, 0))
-
-        # Remove category section
-        remove_frame = ttk.Frame(categories_frame)
-        remove_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
-        remove_frame.columnconfigure(1, weight=1)
-
-        ttk.Label(remove_frame, text="Remove Category:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
-        
-        self.remove_category_var = tk.StringVar()
-        self.remove_combobox = ttk.Combobox(remove_frame, textvariable=self.remove_category_var, 
-                                          font=("Arial", 10), state="readonly")
-        self.remove_combobox.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10))
-        self.update_remove_combobox()
-
-        ttk.Button(remove_frame, text="Remove", command=self.remove_category).grid(row=0, column=2)
-
-        # Search keyword
-        ttk.Label(main_frame, text="Search Keyword:", font=("Arial", 14)).grid(
-            row=2, column=0, sticky=tk.W, pady=(0, 10))
-
-        search_frame = ttk.Frame(main_frame)
-        search_frame.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=(0, 10))
-        search_frame.columnconfigure(0, weight=1)
-
-        self.search_entry = ttk.Entry(
-            search_frame, textvariable=self.search_keyword, font=("Arial", 12))
-        self.search_entry.grid(
-            row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
-        self.search_entry.bind('<Return>', lambda e: self.search_folders())
-
-        self.search_button = ttk.Button(search_frame, text="Search",
-                                       command=self.search_folders)
-        self.search_button.grid(row=0, column=1, padx=(10, 0))
-
-        self.stop_button = ttk.Button(search_frame, text="Stop",
-                                     command=self.stop_search_process, state="disabled")
-        self.stop_button.grid(row=0, column=2, padx=(5, 0))
-
-        # Settings frame
-        settings_frame = ttk.LabelFrame(main_frame, text="Search Settings", padding="10")
-        settings_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        settings_frame.columnconfigure(2, weight=1)
-
-        ttk.Label(settings_frame, text="Max Depth:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
-        depth_spinbox = ttk.Spinbox(settings_frame, from_=1, to=20, width=10, textvariable=self.max_depth)
-        depth_spinbox.grid(row=0, column=1, padx=(0, 20))
-
-        ttk.Label(settings_frame, text="Max Results:").grid(row=0, column=2, sticky=tk.W, padx=(0, 10))
-        results_spinbox = ttk.Spinbox(settings_frame, from_=100, to=10000, width=10, textvariable=self.max_results, increment=100)
-        results_spinbox.grid(row=0, column=3)
-
-        # Progress bar
-        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress.grid(row=4, column=0, columnspan=2,
-                           sticky=(tk.W, tk.E), pady=(0, 10))
-
-        # Status label
-        self.status_label = ttk.Label(
-            main_frame, text="Ready", font=("Arial", 11))
-        self.status_label.grid(
-            row=5, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
-
-        # Real-time results counter
-        self.results_counter = ttk.Label(
-            main_frame, text="Results found: 0", font=("Arial", 10), foreground="blue")
-        self.results_counter.grid(
-            row=6, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
-
-        # Results area
-        results_frame = ttk.Frame(main_frame)
-        results_frame.grid(row=7, column=0, columnspan=2,
-                           sticky=(tk.W, tk.E, tk.N, tk.S))
-        results_frame.columnconfigure(0, weight=1)
-        results_frame.rowconfigure(0, weight=1)
-
-        # Create treeview for results
-        self.tree = ttk.Treeview(results_frame)
-        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-
-        # Configure treeview font
-        style = ttk.Style()
-        style.configure("Treeview", font=("Arial", 11))
-        style.configure("Treeview.Heading", font=("Arial", 12, "bold"))
-
-        # Configure big titles for classification groups
-        self.tree.tag_configure("classification", font=(
-            "Arial", 16, "bold"), foreground="green")
-
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(
-            results_frame, orient="vertical", command=self.tree.yview)
-        v_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        self.tree.configure(yscrollcommand=v_scrollbar.set)
-
-        h_scrollbar = ttk.Scrollbar(
-            results_frame, orient="horizontal", command=self.tree.xview)
-        h_scrollbar.grid(row=1, column=0, sticky=(tk.W, tk.E))
-        self.tree.configure(xscrollcommand=h_scrollbar.set)
-
-        # Configure treeview
-        self.tree.heading('#0', text='Search Results', anchor=tk.W)
-        self.tree.bind('<Double-1>', self.on_item_double_click)
-
-    def update_categories_display(self):
-        """Update the display of current categories"""
-        categories_text = ", ".join(self.classification_categories) if self.classification_categories else "No categories defined"
-        self.categories_var.set(categories_text)
-
-    def update_remove_combobox(self):
-        """Update the remove category combobox"""
-        self.remove_combobox['values'] = self.classification_categories
-        if self.classification_categories:
-            self.remove_combobox.set('')
-
-    def add_category(self):
-        """Add a new classification category"""
-        category = self.new_category_var.get().strip()
-        if not category:
-            messagebox.showwarning("Warning", "Please enter a category name.")
-            return
-        
-        if category in self.classification_categories:
-            messagebox.showwarning("Warning", f"Category '{category}' already exists.")
-            return
-        
-        self.classification_categories.append(category)
-        self.new_category_var.set("")
-        self.update_categories_display()
-        self.update_remove_combobox()
-        self.save_settings()
-
-    def remove_category(self):
-        """Remove a classification category"""
-        category = self.remove_category_var.get()
-        if not category:
-            messagebox.showwarning("Warning", "Please select a category to remove.")
-            return
-        
-        if category in self.classification_categories:
-            self.classification_categories.remove(category)
-            self.update_categories_display()
-            self.update_remove_combobox()
-            self.save_settings()
-
-    def clear_categories(self):
-        """Clear all classification categories"""
-        if messagebox.askyesno("Confirm", "Are you sure you want to clear all categories?"):
-            self.classification_categories.clear()
-            self.update_categories_display()
-            self.update_remove_combobox()
-            self.save_settings()
-
-    def browse_folder(self):
-        folder = filedialog.askdirectory()
-        if folder:
-            self.selected_folder.set(folder)
-            # Save settings when folder changes
-            self.save_settings()
-
-    def search_folders(self):
-        if not self.selected_folder.get():
-            messagebox.showwarning("Warning", "Please select a folder first.")
-            return
-
-        if not self.search_keyword.get().strip():
-            messagebox.showwarning("Warning", "Please enter a search keyword.")
-            return
-
-        # Removed the check for classification categories - search can work without them
-
-        # Check if search is already running
-        if self.search_thread and self.search_thread.is_alive():
-            messagebox.showinfo("Info", "Search is already running. Please wait or stop the current search.")
-            return
-
-        # Clear previous results
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Reset search state
-        self.stop_search = False
-        self.current_results = defaultdict(list)
-
-        # Update UI state
-        self.search_button.config(state="disabled")
-        self.stop_button.config(state="normal")
-        self.progress.start()
-        self.status_label.config(text="Searching...")
-        self.results_counter.config(text="Results found: 0")
-
-        # Start search in a separate thread
-        self.search_thread = threading.Thread(target=self.perform_search_threaded, daemon=True)
-        self.search_thread.start()
-
-        # Start periodic UI updates
-        self.update_ui_periodically()
-
-    def stop_search_process(self):
-        """Stop the current search"""
-        self.stop_search = True
-        self.search_button.config(state="normal")
-        self.stop_button.config(state="disabled")
-        self.progress.stop()
-        self.status_label.config(text="Search stopped by user.")
-
-    def perform_search_threaded(self):
-        """Perform search in a separate thread"""
-        try:
-            self.perform_search()
-        except Exception as e:
-            # Schedule error display in main thread
-            self.root.after(0, lambda: self.handle_search_error(str(e)))
-        finally:
-            # Schedule UI cleanup in main thread
-            self.root.after(0, self.search_completed)
-
-    def handle_search_error(self, error_msg):
-        """Handle search errors in the main thread"""
-        messagebox.showerror("Error", f"An error occurred during search: {error_msg}")
-        self.status_label.config(text="Search failed.")
-        self.search_button.config(state="normal")
-        self.stop_button.config(state="disabled")
-        self.progress.stop()
-
-    def search_completed(self):
-        """Handle search completion in the main thread"""
-        # Final update of results display
-        self.display_results(dict(self.current_results))
-        
-        if not self.stop_search:
-            total_results = sum(len(matches) for matches in self.current_results.values())
-            self.status_label.config(text=f"Search completed. Found {total_results} matches.")
-            self.results_counter.config(text=f"Results found: {total_results}")
-        
-        self.search_button.config(state="normal")
-        self.stop_button.config(state="disabled")
-        self.progress.stop()
-
-    def perform_search(self):
-        base_folder = self.selected_folder.get()
-        keyword = self.search_keyword.get().strip().lower()
-        max_depth = self.max_depth.get()
-        max_results = self.max_results.get()
-        
-        total_found = 0
-        processed_count = 0
-
-        def search_recursive(current_path, current_depth=0, visited_paths=None):
-            nonlocal total_found, processed_count
-            
-            # Check if we should stop
-            if self.stop_search or total_found >= max_results:
-                return
-            
-            # Check depth limit
-            if current_depth > max_depth:
-                return
-
-            if visited_paths is None:
-                visited_paths = set()
-
-            # Avoid infinite loops with symlinks
-            try:
-                real_path = os.path.realpath(current_path)
-                if real_path in visited_paths:
-                    return
-                visited_paths.add(real_path)
-            except (OSError, ValueError):
-                return
-
-            try:
-                # Use os.scandir for better performance
-                with os.scandir(current_path) as entries:
-                    for entry in entries:
-                        if self.stop_search or total_found >= max_results:
-                            break
-                        
-                        processed_count += 1
-                        
-                        # Update status periodically (every 100 items)
-                        if processed_count % 100 == 0:
-                            self.update_status_async(f"Processed {processed_count} items...")
-
-                        try:
-                            # Check if item name contains keyword (case-insensitive)
-                            if keyword in entry.name.lower():
-                                # Found a match - classify (or put in "All Results" if no categories defined)
-                                classification = self.classify_path(entry.path, base_folder)
-                                self.current_results[classification].append(entry.path)
-                                total_found += 1
-                                
-                                # Don't search inside matched directories to improve performance
-                                continue
-
-                            # If no match and it's a directory, continue searching inside
-                            if entry.is_dir(follow_symlinks=False):
-                                search_recursive(entry.path, current_depth + 1, visited_paths.copy())
-                        
-                        except (PermissionError, OSError, FileNotFoundError):
-                            # Skip files/folders we can't access
-                            continue
-
-            except (PermissionError, OSError, FileNotFoundError):
-                return
-
-        search_recursive(base_folder)
-
-    def update_status_async(self, message):
-        """Update status label from background thread"""
-        self.root.after(0, lambda: self.status_label.config(text=message))
-
-    def update_ui_periodically(self):
-        """Update UI with current results periodically"""
-        if self.search_thread and self.search_thread.is_alive():
-            # Update results display if we have results
-            if self.current_results:
-                self.display_results(dict(self.current_results))
-            
-            # Update counter
-            total_results = sum(len(matches) for matches in self.current_results.values())
-            self.results_counter.config(text=f"Results found: {total_results}")
-            
-            # Schedule next update
-            self.root.after(1000, self.update_ui_periodically)  # Increased to 1 second for better performance
-
-    def classify_path(self, item_path, base_folder):
-        # If no categories defined, put everything in "All Results"
-        if not self.classification_categories:
-            return "All Results"
-        
-        # Get relative path from base folder
-        try:
-            rel_path = os.path.relpath(item_path, base_folder)
-            path_parts = Path(rel_path).parts
-
-            # Check if any parent folder contains classification categories
-            for part in path_parts:
-                for category in self.classification_categories:
-                    if category.lower() in part.lower():
-                        return category
-
-            return "Other"
-        except:
-            return "Other"
-
-    def display_results(self, results):
-        # Clear existing results
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Determine which classifications to show
-        if self.classification_categories:
-            classifications_to_show = self.classification_categories + ["Other"]
-        else:
-            classifications_to_show = ["All Results"]
-
-        for i, classification in enumerate(classifications_to_show):
-            matches = results.get(classification, [])
-            if matches:
-                # Add spacing between sections (except for the first one)
-                if i > 0 and any(results.get(prev_class, []) for prev_class in classifications_to_show[:i]):
-                    self.tree.insert('', 'end', text="", values=("spacer",))
-
-                # Create parent node for each classification with big title styling
-                parent = self.tree.insert('', 'end', text=f"📁 {classification} ({len(matches)} matches)",
-                                          values=(classification,), open=True, tags=("classification",))
-
-                # Add each match as a child (limit display for performance)
-                display_limit = min(len(matches), 100)  # Only show first 100 matches per category
-                for j, match in enumerate(matches[:display_limit]):
-                    # Show relative path for cleaner display
-                    try:
-                        display_path = os.path.relpath(match, self.selected_folder.get())
-                    except:
-                        display_path = match
-
-                    self.tree.insert(parent, 'end', text=f"  📄 {display_path}", values=(match,))
-                
-                # Add note if there are more results
-                if len(matches) > display_limit:
-                    self.tree.insert(parent, 'end', 
-                                   text=f"  ... and {len(matches) - display_limit} more results", 
-                                   values=("more",))
-
-    def on_item_double_click(self, event):
-        selection = self.tree.selection()
-        if selection:
-            item = selection[0]
-            values = self.tree.item(item, 'values')
-            if values and len(values) > 0:
-                path = values[0]
-                # Don't open classification headers or spacers
-                valid_categories = self.classification_categories + ["Other", "All Results"] if self.classification_categories else ["All Results"]
-                if (path not in valid_categories + ["spacer", "more", "search_results"] 
-                    and os.path.exists(path)):
-                    self.open_in_explorer(path)
-
-    def open_in_explorer(self, path):
-        try:
-            if platform.system() == "Windows":
-                # If it's a file, select it in explorer, otherwise open the folder
-                if os.path.isfile(path):
-                    subprocess.run(['explorer', '/select,', os.path.normpath(path)], check=True)
-                else:
-                    subprocess.run(['explorer', os.path.normpath(path)], check=True)
-            elif platform.system() == "Darwin":  # macOS
-                subprocess.run(['open', path], check=True)
-            else:  # Linux
-                subprocess.run(['xdg-open', path], check=True)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not open path: {path}\nError: {str(e)}")
-
-
-def main():
-    root = tk.Tk()
-    app = FolderScraperApp(root)
-    root.mainloop()
-
-
-if __name__ == "__main__":
-    main()
+import os
+import sys
+import argparse
+import subprocess
+import platform
+from pathlib import Path
+import threading
+import queue
+import sqlite3
+import select
+import struct
+import errno
+import ctypes
+import ctypes.util
+import multiprocessing
+import time
+import bisect
+import array
+import heapq
+import json
+import hashlib
+import concurrent.futures
+import csv
+import io
+import datetime
+import cProfile
+import pstats
+import re
+import fnmatch
+import collections
+import zipfile
+import tarfile
+import contextlib
+import random
+
+try:
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox
+    from tkinter import font as tkfont
+except ImportError:
+    # Headless installs without Tk can still use the --cli mode
+    tk = ttk = filedialog = messagebox = tkfont = None
+
+
+# Settings file shared by the GUI and the command line mode
+SETTINGS_FILE = os.path.join(os.path.expanduser("~"), ".folder_scraper_settings.txt")
+
+# Optional persistent name index, kept next to the settings file
+INDEX_FILE = os.path.join(os.path.expanduser("~"), ".folder_scraper_index.sqlite3")
+
+# Statistics of the last GUI search, and its cProfile capture when enabled
+PROFILE_FILE = os.path.join(os.path.expanduser("~"), ".folder_scraper_profile.json")
+CPROFILE_FILE = os.path.join(os.path.expanduser("~"), ".folder_scraper_profile.prof")
+
+
+def read_settings(settings_file=SETTINGS_FILE):
+    """Return (saved_folder, categories, options) from the settings file, or (None, [], {}) if unavailable
+
+    The first line holds the folder and the second the categories. Any
+    further lines are key=value options.
+    """
+    saved_folder = None
+    categories = []
+    options = {}
+    try:
+        if os.path.exists(settings_file):
+            with open(settings_file, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+                if lines:
+                    saved_folder = lines[0].strip() or None
+
+                    # Load classification categories if they exist
+                    if len(lines) > 1:
+                        categories_line = lines[1].strip()
+                        if categories_line:
+                            categories = [cat.strip() for cat in categories_line.split(',') if cat.strip()]
+
+                    for line in lines[2:]:
+                        key, sep, value = line.rstrip('\n').partition('=')
+                        if sep and key.strip():
+                            options[key.strip()] = value
+    except:
+        pass
+    return saved_folder, categories, options
+
+
+def format_age(seconds):
+    """Format a duration in seconds as a short human readable string"""
+    if seconds < 60:
+        return f"{int(seconds)} s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} days"
+
+
+def format_size(num_bytes):
+    """Format a size in bytes as a short human readable string"""
+    for unit in ("bytes", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes} {unit}" if unit == "bytes" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def classify_path(item_path, base_folder, categories):
+    """Return the first category found in the path of item_path relative to base_folder"""
+    # If no categories defined, put everything in "All Results"
+    if not categories:
+        return "All Results"
+
+    # Get relative path from base folder
+    try:
+        rel_path = os.path.relpath(item_path, base_folder)
+        path_parts = Path(rel_path).parts
+
+        # Check if any parent folder contains classification categories
+        for part in path_parts:
+            for category in categories:
+                if category.lower() in part.lower():
+                    return category
+
+        return "Other"
+    except:
+        return "Other"
+
+
+class CategoryClassifier:
+    """Classify paths by category with an automaton compiled once per search.
+
+    All categories are merged into one Aho-Corasick automaton over their
+    lowercased names, so each path part is scanned once whatever the number
+    of categories. The precedence is the same as classify_path: the first
+    part (from the base folder down) containing any category wins, and within
+    that part the category defined first wins. The classification of the
+    parent folders is cached per directory, so every file in a folder costs a
+    single lookup plus a scan of its own name.
+    """
+
+    CACHE_SIZE = 65536
+
+    def __init__(self, categories, base_folder):
+        self.categories = list(categories or [])
+        self.base_folder = os.path.normpath(base_folder)
+        self._prefix = self.base_folder if self.base_folder.endswith(os.sep) else self.base_folder + os.sep
+        self._dir_cache = {}
+
+        # Trie of the lowercased categories; out[node] is the lowest category index ending there
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]
+        for index, category in enumerate(self.categories):
+            node = 0
+            for char in category.lower():
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(None)
+                    self._goto[node][char] = next_node
+                node = next_node
+            if self._out[node] is None or index < self._out[node]:
+                self._out[node] = index
+
+        # Breadth-first pass for the failure links, merging outputs along them
+        pending = collections.deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                inherited = self._out[self._fail[child]]
+                if inherited is not None and (self._out[child] is None or inherited < self._out[child]):
+                    self._out[child] = inherited
+                pending.append(child)
+
+    def find(self, text):
+        """Return the index of the first defined category contained in text, or None"""
+        goto, fail, out = self._goto, self._fail, self._out
+        best = out[0]
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            found = out[node]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+
+    def _classify_dir(self, dir_path):
+        """Return the category index of the first folder below the base folder that matches, or None"""
+        try:
+            return self._dir_cache[dir_path]
+        except KeyError:
+            pass
+
+        if dir_path == self.base_folder:
+            parts = []
+        elif dir_path.startswith(self._prefix):
+            parts = dir_path[len(self._prefix):].split(os.sep)
+        else:
+            try:
+                parts = Path(os.path.relpath(dir_path, self.base_folder)).parts
+            except ValueError:
+                parts = []
+
+        result = None
+        for part in parts:
+            result = self.find(part)
+            if result is not None:
+                break
+
+        if len(self._dir_cache) >= self.CACHE_SIZE:
+            self._dir_cache.clear()
+        self._dir_cache[dir_path] = result
+        return result
+
+    def in_category(self, dir_path):
+        """True if dir_path lies in a folder that matches one of the categories"""
+        return bool(self.categories) and self._classify_dir(dir_path) is not None
+
+    def classify_entry(self, dir_path, name):
+        """Classify the entry called name inside dir_path"""
+        if not self.categories:
+            return "All Results"
+        index = self._classify_dir(dir_path)
+        if index is None:
+            index = self.find(name)
+        return self.categories[index] if index is not None else "Other"
+
+    def classify(self, path):
+        dir_path, name = os.path.split(path)
+        return self.classify_entry(dir_path, name)
+
+
+class QueryMatcher:
+    """Match entry names against one or more patterns in a single pass.
+
+    In a batch query, a pattern starting with "re:" is a regular expression,
+    a pattern containing *, ? or [ is a glob matched against the whole name,
+    and anything else is a substring. All patterns are case-insensitive.
+    They are compiled into one combined regex that rejects non-matching names
+    in a single call. Only the names that pass it are checked against the
+    individual patterns, to find every pattern they match. Regexes with
+    groups or inline flags would change meaning inside the combined regex,
+    so they are left out of it and always checked on their own.
+    """
+
+    def __init__(self, patterns, indices=None):
+        # patterns is a list of (label, kind, text) with kind "substring", "glob" or "regex"
+        self.patterns = list(patterns)
+        self.labels = [label for label, _, _ in self.patterns]
+        self.indices = tuple(indices) if indices is not None else tuple(range(len(self.patterns)))
+        self._restricted = {}
+
+        # The lowercase text of a matcher with one substring, which callers can test with `in` themselves
+        self.keyword = None
+        self._substrings = None
+        if all(kind == "substring" for _, kind, _ in self.patterns) and len(self.patterns) <= 4:
+            # A handful of plain substrings is fastest with str.__contains__
+            self._substrings = [(index, text.lower()) for index, (_, _, text) in zip(self.indices, self.patterns)]
+            if len(self._substrings) == 1:
+                self.keyword = self._substrings[0][1]
+            return
+
+        sources = []
+        for _, kind, text in self.patterns:
+            if kind == "regex":
+                sources.append(text)
+            elif kind == "glob":
+                sources.append(r"\A(?:" + fnmatch.translate(text) + ")")
+            else:
+                sources.append(re.escape(text))
+        self._regexes = [(index, re.compile(source, re.IGNORECASE)) for index, source in zip(self.indices, sources)]
+        combinable = [kind != "regex" or self._combinable(regex) for (_, kind, _), (_, regex)
+                      in zip(self.patterns, self._regexes)]
+        # Patterns the combined regex cannot rule out
+        self._separate = [pair for pair, ok in zip(self._regexes, combinable) if not ok]
+        self._combined = None
+        if any(combinable):
+            try:
+                self._combined = re.compile("|".join(f"(?:{source})" for source, ok in zip(sources, combinable) if ok),
+                                            re.IGNORECASE)
+            except re.error:
+                self._separate = self._regexes
+
+    @staticmethod
+    def _combinable(regex):
+        """Whether a regex means the same inside the combined regex: no groups, backreferences or inline flags"""
+        return regex.groups == 0 and "(?" not in regex.pattern.replace("(?:", "")
+
+    @classmethod
+    def for_keyword(cls, keyword):
+        """Matcher for the classic single keyword search"""
+        keyword = keyword.strip().lower()
+        return cls([(keyword, "substring", keyword)])
+
+    @classmethod
+    def for_patterns(cls, patterns):
+        """Matcher for a batch query, guessing the kind of each pattern. Raises re.error for bad regexes"""
+        parsed = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern in [label for label, _, _ in parsed]:
+                continue
+            if pattern.startswith("re:"):
+                re.compile(pattern[3:])
+                parsed.append((pattern, "regex", pattern[3:]))
+            elif any(char in pattern for char in "*?["):
+                parsed.append((pattern, "glob", pattern))
+            else:
+                parsed.append((pattern, "substring", pattern))
+        return cls(parsed)
+
+    def match(self, name):
+        """Return the indices of the patterns name matches, empty if none"""
+        if self.keyword is not None:
+            # Matching the only pattern returns the shared indices tuple
+            return self.indices if self.keyword in name.lower() else ()
+        if self._substrings is not None:
+            lower = name.lower()
+            return tuple(index for index, text in self._substrings if text in lower)
+        if self._combined is None:
+            regexes = self._regexes
+        elif self._combined.search(name) is None:
+            regexes = self._separate
+        elif len(self._regexes) == 1:
+            return (self._regexes[0][0],)
+        else:
+            regexes = self._regexes
+        return tuple(index for index, regex in regexes if regex.search(name))
+
+    def without(self, matched):
+        """Matcher for the patterns not in matched, used below a matched folder. None if nothing is left"""
+        key = frozenset(matched)
+        if key not in self._restricted:
+            keep = [(index, pattern) for index, pattern in zip(self.indices, self.patterns) if index not in key]
+            self._restricted[key] = QueryMatcher([pattern for _, pattern in keep],
+                                                 [index for index, _ in keep]) if keep else None
+        return self._restricted[key]
+
+
+class ExcludeRules:
+    """Compiled gitignore-style exclude patterns.
+
+    * and ? match within a name, [...] is a character class and ** matches
+    any number of folders. A pattern ending in / only matches folders, a
+    pattern containing another / is anchored at the searched root and any
+    other pattern matches names at every depth. A pattern starting with !
+    keeps entries that the other patterns exclude. Blank patterns and
+    patterns starting with # are ignored. As everywhere in the search,
+    patterns are case-insensitive.
+
+    All patterns are compiled into a single regex matched against the path
+    relative to the root, so checking an entry costs one regex call.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = []
+        excludes = []
+        includes = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith("#") or pattern in self.patterns:
+                continue
+            self.patterns.append(pattern)
+            negate = pattern.startswith("!")
+            pattern = pattern[1:] if negate else pattern
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            pattern = pattern.lstrip("/")
+            if not pattern:
+                continue
+            # Folders are matched with a trailing /
+            source = ("" if anchored else "(?:.*/)?") + self._translate(pattern) + ("/" if dir_only else "/?")
+            (includes if negate else excludes).append(source)
+        self._exclude = self._compile(excludes)
+        self._include = self._compile(includes)
+
+    @classmethod
+    def from_text(cls, text):
+        """Rules from patterns separated by ; or newlines, as saved in the settings"""
+        return cls(text.replace("\n", ";").split(";"))
+
+    @staticmethod
+    def _compile(sources):
+        if not sources:
+            return None
+        return re.compile("(?:" + "|".join(f"(?:{source})" for source in sources) + r")\Z",
+                          re.IGNORECASE | re.DOTALL)
+
+    @staticmethod
+    def _translate(pattern):
+        """Regex source for a glob matched against / separated paths"""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                parts.append("(?:.*/)?")
+                i += 3
+            elif pattern.startswith("**", i) and i + 2 == len(pattern) and (i == 0 or pattern[i - 1] == "/"):
+                # A trailing /** matches everything inside, but not the folder itself
+                parts.append(".+")
+                i += 2
+            elif pattern[i] == "*":
+                parts.append("[^/]*")
+                i += 1
+            elif pattern[i] == "?":
+                parts.append("[^/]")
+                i += 1
+            elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+                end = pattern.index("]", i + 2)
+                chars = pattern[i + 1:end].replace("\\", "\\\\")
+                parts.append("[" + ("^" + chars[1:] if chars.startswith("!") else chars) + "]")
+                i = end + 1
+            else:
+                parts.append(re.escape(pattern[i]))
+                i += 1
+        return "".join(parts)
+
+    def __bool__(self):
+        return self._exclude is not None
+
+    def key(self):
+        return tuple(self.patterns)
+
+    def excluded(self, rel_path, is_dir):
+        """True if the entry at rel_path, / separated and relative to the root, is excluded"""
+        if self._exclude is None:
+            return False
+        path = rel_path + "/" if is_dir else rel_path
+        return self._exclude.match(path) is not None and (self._include is None or self._include.match(path) is None)
+
+    def path_excluded(self, rel_parts, name, is_dir):
+        """True if the entry name in the folder rel_parts, or one of the folders above it, is excluded"""
+        rel_path = ""
+        for part in rel_parts:
+            rel_path += part
+            if self.excluded(rel_path, True):
+                return True
+            rel_path += "/"
+        return self.excluded(rel_path + name, is_dir)
+
+
+class SearchMatch:
+    """A single match produced by SearchEngine"""
+
+    __slots__ = ("path", "category", "is_dir", "depth", "patterns", "size", "mtime", "content")
+
+    def __init__(self, path, category, is_dir=False, depth=0, patterns=(), size=None, mtime=None, content=None):
+        self.path = path
+        self.category = category
+        self.is_dir = is_dir
+        self.depth = depth
+        # Batch queries: the patterns this entry matched
+        self.patterns = patterns
+        # Only filled in when the engine collects stat information
+        self.size = size
+        self.mtime = mtime
+        # Content searches: (line number, byte offset, line) of the first hit
+        self.content = content
+
+    def __repr__(self):
+        return f"SearchMatch({self.path!r}, {self.category!r})"
+
+
+class ResultStore:
+    """Append-only, compact storage of search matches.
+
+    Folder paths are interned once and every match is a row in array-backed
+    columns: folder id, name (UTF-8 in one shared buffer), category, matched
+    patterns, depth and folder flag. Full paths and SearchMatch objects are
+    only built when a row is read. Rows are also listed per group, the
+    classification or for batch queries each matched pattern, in the order
+    they arrived.
+
+    One thread may append while others read. A row is added to its groups
+    only after all its columns are written and nothing is changed in place,
+    so readers never need a copy.
+    """
+
+    # Rough size of a str object and its list and dict slots, for nbytes()
+    STRING_OVERHEAD = 120
+
+    def __init__(self):
+        # Interned folder paths, each ending in a separator
+        self._dirs = []
+        self._dir_ids = {}
+        self._dir_bytes = 0
+        # Interned categories and pattern tuples
+        self._labels = []
+        self._label_ids = {}
+
+        self._dir_column = array.array('I')
+        # Name of row r is _names[_name_offsets[r]:_name_offsets[r + 1]]
+        self._name_offsets = array.array('Q', [0])
+        self._names = bytearray()
+        self._category_column = array.array('I')
+        self._patterns_column = array.array('I')
+        self._depth_column = array.array('H')
+        self._is_dir_column = bytearray()
+        # group -> rows
+        self._groups = {}
+        # row -> (line number, offset, line) for content search hits
+        self._content = {}
+
+    def __len__(self):
+        # The folder flag is the last column written
+        return len(self._is_dir_column)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.match(row)
+
+    def _label_id(self, label):
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self._labels)
+            self._labels.append(label)
+        return label_id
+
+    def append(self, match):
+        """Add a SearchMatch and return its row"""
+        path = match.path
+        # Split after the last separator, so folder + name gives back the exact path
+        cut = path.rfind(os.sep) + 1
+        if os.altsep:
+            cut = max(cut, path.rfind(os.altsep) + 1)
+        folder = path[:cut]
+
+        dir_id = self._dir_ids.get(folder)
+        if dir_id is None:
+            dir_id = self._dir_ids[folder] = len(self._dirs)
+            self._dirs.append(folder)
+            self._dir_bytes += len(folder) + self.STRING_OVERHEAD
+
+        # surrogatepass round-trips undecodable names too
+        self._names += path[cut:].encode('utf-8', 'surrogatepass')
+        self._name_offsets.append(len(self._names))
+        self._dir_column.append(dir_id)
+        self._category_column.append(self._label_id(match.category))
+        self._patterns_column.append(self._label_id(tuple(match.patterns)))
+        self._depth_column.append(min(match.depth, 0xFFFF))
+        row = len(self._is_dir_column)
+        if match.content is not None:
+            self._content[row] = match.content
+        self._is_dir_column.append(1 if match.is_dir else 0)
+
+        for group in (match.patterns or (match.category,)):
+            rows = self._groups.get(group)
+            if rows is None:
+                rows = self._groups[group] = array.array('I')
+            rows.append(row)
+        return row
+
+    def name(self, row):
+        start, end = self._name_offsets[row], self._name_offsets[row + 1]
+        return self._names[start:end].decode('utf-8', 'surrogatepass')
+
+    def path(self, row):
+        return self._dirs[self._dir_column[row]] + self.name(row)
+
+    def category(self, row):
+        return self._labels[self._category_column[row]]
+
+    def is_dir(self, row):
+        return bool(self._is_dir_column[row])
+
+    def depth(self, row):
+        return self._depth_column[row]
+
+    def content(self, row):
+        """Return (line number, offset, line) of a content search hit, None for name matches"""
+        return self._content.get(row)
+
+    def match(self, row):
+        """Build the SearchMatch of a row"""
+        return SearchMatch(self.path(row), self.category(row), self.is_dir(row), self.depth(row),
+                           self._labels[self._patterns_column[row]], content=self._content.get(row))
+
+    def groups(self):
+        return list(self._groups)
+
+    def group_size(self, group):
+        return len(self._groups.get(group, ()))
+
+    def group_row(self, group, index):
+        """Return the row of the index-th match of a group"""
+        return self._groups[group][index]
+
+    def nbytes(self):
+        """Approximate memory used by the stored matches"""
+        columns = (self._dir_column, self._name_offsets, self._category_column, self._patterns_column,
+                   self._depth_column, *self._groups.values())
+        return (sum(len(column) * column.itemsize for column in columns) + len(self._names)
+                + len(self._is_dir_column) + self._dir_bytes + len(self._labels) * self.STRING_OVERHEAD
+                + sum(len(line) + self.STRING_OVERHEAD for _, _, line in self._content.values()))
+
+
+class ResultExporter:
+    """Stream matches to a CSV or JSON Lines file while the search runs.
+
+    Rows are buffered and written in batches of whole lines, so memory stays
+    flat and the file is valid at any time, including after a stopped
+    search. Size and modification time come from the match when the engine
+    collected them, otherwise the path is stat'ed here.
+    """
+
+    FORMATS = ("csv", "jsonl")
+    FIELDS = ("path", "category", "patterns", "type", "size", "mtime", "line_number", "offset", "line")
+
+    def __init__(self, path, export_format=None, follow_symlinks=False, batch_size=1000, batch_interval=1.0):
+        if export_format is None:
+            export_format = "jsonl" if path.lower().endswith((".jsonl", ".json", ".ndjson")) else "csv"
+        if export_format not in self.FORMATS:
+            raise ValueError(f"unknown export format: {export_format}")
+        self.path = path
+        self.export_format = export_format
+        self.follow_symlinks = follow_symlinks
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.count = 0
+
+        # Undecodable POSIX names are written back as their original bytes
+        self._file = open(path, 'w', encoding='utf-8', newline='',
+                          errors='surrogateescape' if os.name != 'nt' else 'replace')
+        self._buffer = io.StringIO()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        if export_format == "csv":
+            self._writer = csv.writer(self._buffer)
+            self._writer.writerow(self.FIELDS)
+            self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, match):
+        size, mtime = match.size, match.mtime
+        if size is None:
+            try:
+                st = os.stat(match.path, follow_symlinks=self.follow_symlinks)
+                size, mtime = st.st_size, st.st_mtime
+            except OSError:
+                pass
+        if mtime is not None:
+            mtime = datetime.datetime.fromtimestamp(mtime, datetime.timezone.utc).isoformat()
+        kind = "folder" if match.is_dir else "file"
+        line_number, offset, line = match.content or (None, None, None)
+
+        if self.export_format == "csv":
+            self._writer.writerow((match.path, match.category, ";".join(match.patterns), kind,
+                                   "" if match.is_dir or size is None else size, mtime or "",
+                                   "" if line_number is None else line_number, "" if offset is None else offset,
+                                   line or ""))
+        else:
+            record = {"path": match.path, "category": match.category, "patterns": list(match.patterns),
+                      "type": kind, "size": None if match.is_dir else size, "mtime": mtime,
+                      "line_number": line_number, "offset": offset, "line": line}
+            self._buffer.write(json.dumps(record) + "\n")
+
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.batch_size or time.monotonic() - self._last_flush > self.batch_interval:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered lines to the file"""
+        self._file.write(self._buffer.getvalue())
+        self._file.flush()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class ResultChannel:
+    """Bounded channel of match chunks from a search thread to the Tk main loop.
+
+    The producer collects matches into chunks and hands a chunk over when it
+    is full, when the consumer has caught up or after chunk_interval seconds,
+    so a fast scan costs one queue operation per chunk and a slow one shows
+    matches right away. When max_chunks are waiting, put() blocks until the
+    main loop drains, but gives up as soon as cancelled() is true so Stop is
+    never held up by a full channel.
+    """
+
+    def __init__(self, cancelled=None, chunk_size=512, max_chunks=64, chunk_interval=0.05):
+        self.cancelled = cancelled or (lambda: False)
+        self.chunk_size = chunk_size
+        self.chunk_interval = chunk_interval
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._chunk = []
+        self._last_send = time.monotonic()
+        self._done = object()
+
+    def put(self, match):
+        """Add a match, False if the search was cancelled while waiting for room"""
+        self._chunk.append(match)
+        if (len(self._chunk) >= self.chunk_size or self._queue.empty()
+                or time.monotonic() - self._last_send >= self.chunk_interval):
+            return self._send(self._chunk)
+        return True
+
+    def _send(self, item):
+        if item is self._chunk:
+            self._chunk = []
+        self._last_send = time.monotonic()
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self.cancelled() and item is not self._done:
+                    return False
+
+    def close(self):
+        """Send the last chunk and tell the consumer that the search has ended"""
+        if self._chunk and not self.cancelled():
+            self._send(self._chunk)
+        elif self._chunk:
+            # After Stop, keep the last matches only if there is room right away
+            try:
+                self._queue.put_nowait(self._chunk)
+            except queue.Full:
+                pass
+        self._send(self._done)
+
+    def drain(self, max_chunks):
+        """Return (matches, finished) with the matches of at most max_chunks chunks, never blocks"""
+        matches = []
+        for _ in range(max_chunks):
+            try:
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is self._done:
+                return matches, True
+            matches.extend(chunk)
+        return matches, False
+
+
+class SearchStats:
+    """Counters and timers showing where a search spends its time.
+
+    Scanner threads report once per folder, so the overhead is a lock and a
+    few additions per folder plus two clock reads per match. Folder scan
+    times are summed over all threads and exclude the time the consumer
+    spends handling yielded matches.
+    """
+
+    # Upper bounds in seconds of the folder scan latency buckets, the last bucket is open ended
+    LATENCY_BUCKETS = (0.001, 0.01, 0.1, 1.0)
+    SLOWEST_DIRS = 10
+    TIMED_OUT_DIRS = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.dirs_scanned = 0
+        self.entries_scanned = 0
+        self.entries_excluded = 0
+        self.permission_errors = 0
+        self.other_errors = 0
+        # Folders skipped because their listing took longer than the timeout
+        self.timeouts = 0
+        self.timed_out = []
+        self.matches = 0
+        self.first_result = None
+        self.scan_seconds = 0.0
+        self.classify_seconds = 0.0
+        self.ui_seconds = 0.0
+        self.ui_updates = 0
+        # Content searches
+        self.files_read = 0
+        self.bytes_read = 0
+        self.binary_skipped = 0
+        self.read_seconds = 0.0
+        self.latency_histogram = [0] * (len(self.LATENCY_BUCKETS) + 1)
+        # Min-heap of (seconds, path) keeping the slowest folders
+        self._slowest = []
+
+    def record_directory(self, path, seconds, entries, classify_seconds, excluded=0):
+        bucket = bisect.bisect_left(self.LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self.dirs_scanned += 1
+            self.entries_scanned += entries
+            self.entries_excluded += excluded
+            self.scan_seconds += seconds
+            self.classify_seconds += classify_seconds
+            self.latency_histogram[bucket] += 1
+            self._push_slowest(seconds, path)
+
+    def _push_slowest(self, seconds, path):
+        if len(self._slowest) < self.SLOWEST_DIRS:
+            heapq.heappush(self._slowest, (seconds, path))
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (seconds, path))
+
+    def record_read(self, seconds, bytes_read, binary=False):
+        with self._lock:
+            self.files_read += 1
+            self.bytes_read += bytes_read
+            self.read_seconds += seconds
+            if binary:
+                self.binary_skipped += 1
+
+    def record_error(self, error, path=None):
+        with self._lock:
+            if isinstance(error, PermissionError):
+                self.permission_errors += 1
+            elif isinstance(error, TimeoutError):
+                self.timeouts += 1
+                if len(self.timed_out) < self.TIMED_OUT_DIRS:
+                    self.timed_out.append(path)
+            else:
+                self.other_errors += 1
+
+    def record_match(self):
+        # Only called from the thread consuming the search
+        self.matches += 1
+        if self.first_result is None:
+            self.first_result = time.perf_counter() - self.started
+
+    def record_ui(self, seconds):
+        # Only called from the Tk thread
+        self.ui_seconds += seconds
+        self.ui_updates += 1
+
+    def finish(self):
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self.started
+
+    def merge(self, snapshot):
+        """Add the folder statistics of a worker process snapshot"""
+        with self._lock:
+            self.dirs_scanned += snapshot["dirs_scanned"]
+            self.entries_scanned += snapshot["entries_scanned"]
+            self.entries_excluded += snapshot["entries_excluded"]
+            self.permission_errors += snapshot["permission_errors"]
+            self.other_errors += snapshot["other_errors"]
+            self.timeouts += snapshot["timeouts"]
+            self.timed_out.extend(snapshot["timed_out_dirs"][:self.TIMED_OUT_DIRS - len(self.timed_out)])
+            self.scan_seconds += snapshot["scan_seconds"]
+            self.classify_seconds += snapshot["classify_seconds"]
+            self.files_read += snapshot["files_read"]
+            self.bytes_read += snapshot["bytes_read"]
+            self.binary_skipped += snapshot["binary_skipped"]
+            self.read_seconds += snapshot["read_seconds"]
+            for bucket, count in enumerate(snapshot["latency_histogram"].values()):
+                self.latency_histogram[bucket] += count
+            for slow in snapshot["slowest_dirs"]:
+                self._push_slowest(slow["seconds"], slow["path"])
+
+    def snapshot(self):
+        """Return the statistics as a JSON-ready dict"""
+        with self._lock:
+            elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+            labels = [f"<{bound * 1000:g}ms" for bound in self.LATENCY_BUCKETS]
+            labels.append(f">={self.LATENCY_BUCKETS[-1] * 1000:g}ms")
+            return {
+                "elapsed_seconds": round(elapsed, 4),
+                "first_result_seconds": round(self.first_result, 4) if self.first_result is not None else None,
+                "dirs_scanned": self.dirs_scanned,
+                "entries_scanned": self.entries_scanned,
+                "entries_per_second": round(self.entries_scanned / elapsed) if elapsed else 0,
+                "entries_excluded": self.entries_excluded,
+                "matches": self.matches,
+                "permission_errors": self.permission_errors,
+                "other_errors": self.other_errors,
+                "timeouts": self.timeouts,
+                "timed_out_dirs": list(self.timed_out),
+                "scan_seconds": round(self.scan_seconds, 4),
+                "classify_seconds": round(self.classify_seconds, 4),
+                "ui_seconds": round(self.ui_seconds, 4),
+                "ui_updates": self.ui_updates,
+                "files_read": self.files_read,
+                "bytes_read": self.bytes_read,
+                "binary_skipped": self.binary_skipped,
+                "read_seconds": round(self.read_seconds, 4),
+                "latency_histogram": dict(zip(labels, self.latency_histogram)),
+                "slowest_dirs": [{"path": path, "seconds": round(seconds, 4)}
+                                 for seconds, path in sorted(self._slowest, reverse=True)],
+            }
+
+    def describe(self):
+        """One line summary for the stats panel"""
+        stats = self.snapshot()
+        average = stats["scan_seconds"] / stats["dirs_scanned"] * 1000 if stats["dirs_scanned"] else 0.0
+        text = (f"{stats['dirs_scanned']} folders, {stats['entries_scanned']} entries "
+                f"({stats['entries_per_second']}/s), scan {average:.2f} ms/folder, "
+                f"classify {stats['classify_seconds'] * 1000:.0f} ms, UI {stats['ui_seconds'] * 1000:.0f} ms, "
+                f"{stats['permission_errors'] + stats['other_errors']} errors")
+        if stats["timeouts"]:
+            text += f", {stats['timeouts']} folders timed out"
+        if stats["entries_excluded"]:
+            text += f", {stats['entries_excluded']} excluded"
+        if stats["first_result_seconds"] is not None:
+            text += f", first result after {stats['first_result_seconds'] * 1000:.0f} ms"
+        if stats["files_read"]:
+            text += (f", read {stats['files_read']} files ({stats['bytes_read'] / (1024 * 1024):.1f} MB, "
+                     f"{stats['binary_skipped']} binary)")
+        if stats["slowest_dirs"]:
+            slowest = stats["slowest_dirs"][0]
+            text += f"\nSlowest folder: {slowest['path']} ({slowest['seconds'] * 1000:.0f} ms)"
+        if stats["timed_out_dirs"]:
+            text += f"\nTimed out: {stats['timed_out_dirs'][0]}"
+        return text
+
+
+class ContentSearcher:
+    """Finds a text inside files, for SearchEngine's content search mode.
+
+    Files are read in chunks, overlapping by the length of the text so hits
+    across chunk borders are found, and reading stops at the first hit.
+    Plain reads release the GIL while waiting for the disk, which lets the
+    reader threads overlap their I/O. A file whose first block contains a
+    NUL byte is treated as binary and skipped, which also skips UTF-16 text.
+    The search is case-insensitive for ASCII letters.
+    """
+
+    BINARY_CHECK = 8192
+    MAX_LINE = 300
+
+    def __init__(self, text, extensions=None, max_size=20 * 1024 * 1024, readers=4, chunk_size=1024 * 1024):
+        self.text = text.strip()
+        if not self.text:
+            raise ValueError("content search needs a text to look for")
+        needle = self.text.encode('utf-8')
+        self.pattern = re.compile(re.escape(needle), re.IGNORECASE)
+        self.overlap = len(needle) - 1
+        # Lower case extensions with a leading dot, empty means every file
+        self.extensions = tuple(sorted({"." + ext.strip().lower().lstrip(".")
+                                        for ext in (extensions or []) if ext.strip(". ")}))
+        self.max_size = max_size
+        self.readers = max(1, readers)
+        self.chunk_size = max(chunk_size, len(needle) * 2)
+
+    def key(self):
+        """Everything that determines which files are hits"""
+        return self.text.lower(), self.extensions, self.max_size
+
+    def accepts(self, name, size):
+        """True if a file with this name and size should be read"""
+        if size is not None and (size == 0 or size > self.max_size):
+            return False
+        return not self.extensions or name.lower().endswith(self.extensions)
+
+    def search_file(self, path, stats=None, cancelled=None):
+        """Return (line number, offset, line) of the first hit in the file, or None"""
+        started = time.perf_counter()
+        bytes_read = 0
+        binary = False
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(self.chunk_size)
+                bytes_read = len(data)
+                if b'\0' in data[:self.BINARY_CHECK]:
+                    binary = True
+                    return None
+
+                # File offset and line number of data[0]
+                position = 0
+                line_number = 1
+                while data:
+                    hit = self.pattern.search(data)
+                    if hit:
+                        start = hit.start()
+                        line_start = data.rfind(b'\n', 0, start) + 1
+                        line_end = data.find(b'\n', start)
+                        if line_end < 0:
+                            line_end = len(data)
+                        line = data[line_start:line_end][:self.MAX_LINE].decode('utf-8', 'replace').strip()
+                        return line_number + data.count(b'\n', 0, start), position + start, line
+                    if cancelled and cancelled():
+                        return None
+
+                    more = f.read(self.chunk_size)
+                    if not more:
+                        return None
+                    bytes_read += len(more)
+                    # Keep the end of this chunk so a hit across the border is found
+                    keep_from = len(data) - self.overlap if self.overlap else len(data)
+                    line_number += data.count(b'\n', 0, keep_from)
+                    position += keep_from
+                    data = data[keep_from:] + more
+        finally:
+            if stats is not None:
+                stats.record_read(time.perf_counter() - started, bytes_read, binary)
+
+
+class MetadataFilter:
+    """Size, modification time and extension criteria for matches.
+
+    Extensions are checked on the name alone. Sizes and times come from
+    DirEntry.stat(), which Windows fills in while listing the folder and
+    other systems fetch once per match and then cache. Folders have no
+    size or extension, so those criteria only let files through.
+
+    Times are given in days before now and resolved to timestamps when the
+    filter is created. key() keeps the days, so the same filter created
+    for a later search still has the same cache key.
+    """
+
+    def __init__(self, min_size=None, max_size=None, newer_than=None, older_than=None, extensions=None):
+        self.min_size = min_size
+        self.max_size = max_size
+        # Days before now
+        self.newer_than = newer_than
+        self.older_than = older_than
+        now = time.time()
+        # Unix timestamps
+        self.modified_after = now - newer_than * 86400 if newer_than is not None else None
+        self.modified_before = now - older_than * 86400 if older_than is not None else None
+        self.extensions = tuple(sorted({"." + ext.strip().lower().lstrip(".")
+                                        for ext in (extensions or []) if ext.strip(". ")}))
+
+    def __bool__(self):
+        return self.needs_stat or bool(self.extensions)
+
+    @property
+    def needs_stat(self):
+        return any(value is not None for value in (self.min_size, self.max_size,
+                                                   self.modified_after, self.modified_before))
+
+    def key(self):
+        return self.min_size, self.max_size, self.newer_than, self.older_than, self.extensions
+
+    def accepts_name(self, name, is_dir):
+        if not self.extensions:
+            return True
+        return not is_dir and name.lower().endswith(self.extensions)
+
+    def accepts_stat(self, size, mtime, is_dir):
+        if (self.min_size is not None or self.max_size is not None) and is_dir:
+            return False
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        if self.modified_after is not None and mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and mtime > self.modified_before:
+            return False
+        return True
+
+
+class ArchiveReader:
+    """Lists the members of zip and tar archives so they can be searched like folders.
+
+    Zip archives are listed from their central directory alone. Tar archives
+    are read header by header, seeking over the member data of plain tars;
+    compressed tars have to be decompressed as they are read, but nothing is
+    extracted. Listings are cached by (path, size, mtime), so a repeated
+    search only stats the archive. The cache keeps at most max_members
+    members and evicts the least recently used archives.
+
+    Members are found at virtual paths like archive.zip!/inner/path.
+    """
+
+    EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+    SEPARATOR = "!/"
+
+    def __init__(self, max_members=500000):
+        self.max_members = max_members
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._entries = collections.OrderedDict()  # (path, size, mtime) -> members
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes start with an empty cache of their own
+        return {"max_members": self.max_members}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_members"])
+
+    @classmethod
+    def is_archive(cls, name):
+        return name.lower().endswith(cls.EXTENSIONS)
+
+    @classmethod
+    def split_path(cls, path):
+        """Return (archive_path, inner_path) of a virtual member path, or (path, None) for a regular path"""
+        archive_path, sep, inner_path = path.partition(cls.SEPARATOR)
+        return (archive_path, inner_path) if sep else (path, None)
+
+    def members(self, path, size, mtime):
+        """Return the (inner_path, is_dir, size, mtime) members of an archive, parents before their contents.
+
+        Folders only implied by the paths of their members are listed too.
+        Raises OSError for archives that cannot be read. Corrupt archives
+        are cached as well, so they are not read again.
+        """
+        key = (path, size, mtime)
+        with self._lock:
+            members = self._entries.get(key)
+            if members is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if isinstance(members, str):
+                    raise OSError(members)
+                return members
+            self.misses += 1
+
+        try:
+            if path.lower().endswith(".zip"):
+                members = self._list_zip(path)
+            else:
+                members = self._list_tar(path)
+        except OSError:
+            with self._lock:
+                self.errors += 1
+            raise
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, ValueError) as e:
+            message = f"could not read archive {path}: {e}"
+            with self._lock:
+                self.errors += 1
+                # Remembered as the error message, which counts as one member
+                self._entries[key] = message
+                self._size += 1
+            raise OSError(message) from e
+
+        with self._lock:
+            if key not in self._entries and len(members) <= self.max_members:
+                self._entries[key] = members
+                self._size += len(members)
+                while self._size > self.max_members:
+                    evicted = self._entries.popitem(last=False)[1]
+                    self._size -= 1 if isinstance(evicted, str) else len(evicted)
+        return members
+
+    @staticmethod
+    def _list_zip(path):
+        members = []
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                try:
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                except (OverflowError, ValueError):
+                    mtime = None
+                members.append((info.filename, info.is_dir(), info.file_size, mtime))
+        return ArchiveReader._with_folders(members)
+
+    @staticmethod
+    def _list_tar(path):
+        members = []
+        with tarfile.open(path, "r:*") as archive:
+            # next() reads one header at a time and seeks over the member data
+            info = archive.next()
+            while info is not None:
+                members.append((info.name, info.isdir(), info.size, info.mtime))
+                # Only the listing is needed, don't keep every TarInfo around
+                archive.members.clear()
+                info = archive.next()
+        return ArchiveReader._with_folders(members)
+
+    @staticmethod
+    def _with_folders(raw_members):
+        """Normalize member paths, add implied folders and sort parents before their contents"""
+        members = {}
+        for name, is_dir, size, mtime in raw_members:
+            name = name.replace("\\", "/").strip("/")
+            while name.startswith("./"):
+                name = name[2:]
+            if not name or name == ".":
+                continue
+            members[name] = (name, is_dir, None if is_dir else size, mtime)
+            parent = name.rpartition("/")[0]
+            while parent and parent not in members:
+                members[parent] = (parent, True, None, None)
+                parent = parent.rpartition("/")[0]
+        return sorted(members.values(), key=lambda member: member[0].split("/"))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def describe(self):
+        return (f"Archives: {self.hits} cached, {self.misses} read, {self.errors} unreadable, "
+                f"{self._size} members cached")
+
+
+class DuplicateFinder:
+    """Finds groups of identical files, reading as little as possible.
+
+    Files are grouped by size first, using the size from the scandir stat
+    cache. Hard links to a file already in its size group are dropped, as
+    they share their data. Only files sharing a size get the first and last
+    PARTIAL_SIZE bytes hashed, and only files that still collide are hashed
+    in full.
+    Hashing runs in a pool of worker threads, file reads and hashlib release
+    the GIL so they overlap. Can be used as the file_filter of
+    SearchEngine.files() to skip files smaller than min_size.
+    """
+
+    PARTIAL_SIZE = 4096
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, workers=4, min_size=1):
+        self.workers = max(1, workers)
+        self.min_size = min_size
+        self.files_seen = 0
+        self.hard_links = 0
+        self.partial_hashed = 0
+        self.full_hashed = 0
+        self.bytes_read = 0
+        self.errors = 0
+        self._count_lock = threading.Lock()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def accepts(self, name, size):
+        return size is None or size >= self.min_size
+
+    def stat_paths(self, paths):
+        """Yield SearchMatch objects with the sizes of the given file paths"""
+        for path in paths:
+            if self.cancelled:
+                return
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                self.errors += 1
+                continue
+            if self.accepts(os.path.basename(path), size):
+                yield SearchMatch(path, None, size=size)
+
+    def stat_matches(self, matches):
+        """Like stat_paths for SearchMatch objects, reusing the sizes the search already collected"""
+        for match in matches:
+            if match.size is None:
+                yield from self.stat_paths((match.path,))
+            elif self.cancelled:
+                return
+            elif self.accepts(os.path.basename(match.path), match.size):
+                yield match
+
+    def find(self, files, status_callback=None):
+        """Return [(size, [paths])] for every set of identical files, largest wasted space first.
+
+        files yields objects with path and size, like SearchMatch. The answer is incomplete when cancelled.
+        """
+        by_size = {}
+        seen = set()
+        for match in files:
+            if self.cancelled:
+                return []
+            path = os.path.normcase(os.path.abspath(match.path))
+            if path in seen:
+                continue
+            seen.add(path)
+            self.files_seen += 1
+            by_size.setdefault(match.size, []).append(match.path)
+        groups = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+        del by_size, seen
+        groups = self._without_hard_links(groups)
+
+        if status_callback:
+            status_callback(f"Comparing {sum(len(paths) for _, paths in groups)} files of "
+                            f"{self.files_seen} with the same size...")
+        groups = self._regroup(groups, self._partial_hash)
+
+        # Files small enough to be read completely by the partial hash are already confirmed
+        confirmed = [(size, paths) for size, paths in groups if size <= 2 * self.PARTIAL_SIZE]
+        pending = [(size, paths) for size, paths in groups if size > 2 * self.PARTIAL_SIZE]
+        if status_callback and pending:
+            status_callback(f"Hashing {sum(len(paths) for _, paths in pending)} files in full...")
+        confirmed.extend(self._regroup(pending, self._full_hash))
+
+        confirmed.sort(key=lambda group: group[0] * (len(group[1]) - 1), reverse=True)
+        return confirmed
+
+    def _without_hard_links(self, groups):
+        """Keep one path per (st_dev, st_ino) in each group of (size, paths), removing copies that free no space"""
+        distinct_groups = []
+        for size, paths in groups:
+            inodes = set()
+            distinct = []
+            for path in paths:
+                if self.cancelled:
+                    return []
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    self.errors += 1
+                    continue
+                key = (st.st_dev, st.st_ino)
+                if key in inodes:
+                    self.hard_links += 1
+                    continue
+                inodes.add(key)
+                distinct.append(path)
+            if len(distinct) > 1:
+                distinct_groups.append((size, distinct))
+        return distinct_groups
+
+    def _regroup(self, groups, hash_file):
+        """Split groups of (size, paths) by hash_file(path, size) and keep the groups that still have copies"""
+        items = [(size, path) for size, paths in groups for path in paths]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            digests = pool.map(lambda item: hash_file(item[1], item[0]), items)
+            split = {}
+            for (size, path), digest in zip(items, digests):
+                if digest is not None:
+                    split.setdefault((size, digest), []).append(path)
+        return [(size, paths) for (size, _), paths in split.items() if len(paths) > 1]
+
+    def _partial_hash(self, path, size):
+        if self.cancelled:
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(path, 'rb') as f:
+                if size <= 2 * self.PARTIAL_SIZE:
+                    data = f.read()
+                else:
+                    data = f.read(self.PARTIAL_SIZE)
+                    f.seek(-self.PARTIAL_SIZE, os.SEEK_END)
+                    data += f.read(self.PARTIAL_SIZE)
+        except OSError:
+            with self._count_lock:
+                self.errors += 1
+            return None
+        digest.update(data)
+        with self._count_lock:
+            self.partial_hashed += 1
+            self.bytes_read += len(data)
+        return digest.digest()
+
+    def _full_hash(self, path, size):
+        digest = hashlib.blake2b(digest_size=32)
+        read = 0
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    if self.cancelled:
+                        return None
+                    chunk = f.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    read += len(chunk)
+        except OSError:
+            with self._count_lock:
+                self.errors += 1
+            return None
+        finally:
+            with self._count_lock:
+                self.bytes_read += read
+        with self._count_lock:
+            self.full_hashed += 1
+        return digest.digest()
+
+    def describe(self):
+        return (f"{self.files_seen} files, {self.hard_links} hard links skipped, "
+                f"{self.partial_hashed} partly and {self.full_hashed} fully hashed, "
+                f"{format_size(self.bytes_read)} read, {self.errors} errors")
+
+
+def profile_summary(profiler, limit=25):
+    """Return the functions of a cProfile capture with the highest cumulative time as JSON-ready dicts"""
+    entries = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in pstats.Stats(profiler).stats.items():
+        entries.append({"function": f"{os.path.basename(filename)}:{line}({function})", "calls": calls,
+                        "total_seconds": round(total, 4), "cumulative_seconds": round(cumulative, 4)})
+    entries.sort(key=lambda entry: entry["cumulative_seconds"], reverse=True)
+    return entries[:limit]
+
+
+class LocalBackend:
+    """Filesystem access used by the SearchEngine traversal: the local os functions.
+
+    A backend provides scandir(path), a context manager over os.DirEntry
+    like objects, and stat(path). Other backends can stand in for slow or
+    remote filesystems.
+    """
+
+    def scandir(self, path):
+        return os.scandir(path)
+
+    def stat(self, path, follow_symlinks=True):
+        return os.stat(path, follow_symlinks=follow_symlinks)
+
+
+class SimulatedBackend(LocalBackend):
+    """Local files behind the latency and failures of a slow network share.
+
+    Every scandir() and stat() call, including the first stat() of each
+    entry, waits latency seconds plus up to jitter seconds and fails with
+    an I/O error with probability error_rate. With probability hang_rate a
+    folder listing hangs for hang_seconds, like an unresponsive share.
+    The same seed gives the same delays and failures for the same calls
+    in the same order.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, hang_rate=0.0, hang_seconds=3600.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.seed = seed
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes get their own random sequence and counters
+        return {key: value for key, value in self.__dict__.items() if key not in ("_random", "_lock")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._random = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def _call(self, path, listing=False):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+            hung = listing and self._random.random() < self.hang_rate
+        time.sleep(self.hang_seconds if hung else delay)
+        if failed:
+            raise OSError(errno.EIO, "simulated I/O error", path)
+
+    def scandir(self, path):
+        self._call(path, listing=True)
+        with os.scandir(path) as entries:
+            return contextlib.nullcontext([SimulatedEntry(entry, self) for entry in entries])
+
+    def stat(self, path, follow_symlinks=True):
+        self._call(path)
+        return os.stat(path, follow_symlinks=follow_symlinks)
+
+
+class SimulatedEntry:
+    """os.DirEntry of a SimulatedBackend listing, whose first stat() goes through the backend"""
+
+    __slots__ = ("_entry", "_backend", "_stat", "name", "path")
+
+    def __init__(self, entry, backend):
+        self._entry = entry
+        self._backend = backend
+        self._stat = {}
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self, follow_symlinks=True):
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, follow_symlinks=True):
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def is_junction(self):
+        return getattr(self._entry, "is_junction", lambda: False)()
+
+    def inode(self):
+        return self._entry.inode()
+
+    def stat(self, follow_symlinks=True):
+        if follow_symlinks not in self._stat:
+            self._backend._call(self.path)
+            self._stat[follow_symlinks] = self._entry.stat(follow_symlinks=follow_symlinks)
+        return self._stat[follow_symlinks]
+
+
+class ListingPool:
+    """A fixed number of daemon threads that run the filesystem calls of a search with dir_timeout.
+
+    call() waits at most timeout seconds for a result. A call that hangs
+    keeps its thread, so after give_up_after timeouts in a row the pool
+    stops scheduling calls and fails them at once. Unlike a
+    ThreadPoolExecutor, hung daemon threads do not hold up the exit of the
+    program. A thread is only started when none is idle, and again after
+    shutdown(), so one pool can serve several searches.
+    """
+
+    def __init__(self, size, give_up_after=20):
+        self.size = size
+        self.give_up_after = give_up_after
+        self.timeouts_in_row = 0
+        self._tasks = queue.Queue()
+        self._threads = 0
+        self._idle = 0
+        self._lock = threading.Lock()
+
+    def call(self, function, path, timeout, cancel_event):
+        """Return function(path), raising TimeoutError after timeout seconds and InterruptedError on cancel"""
+        if self.timeouts_in_row >= self.give_up_after:
+            raise TimeoutError(errno.ETIMEDOUT, f"skipped after {self.timeouts_in_row} timeouts in a row", path)
+        with self._lock:
+            if self._idle <= 0 and self._threads < self.size:
+                self._threads += 1
+                self._idle += 1
+                threading.Thread(target=self._work, args=(self._tasks,), daemon=True).start()
+            self._idle -= 1
+            future = concurrent.futures.Future()
+            self._tasks.put((future, function, path))
+
+        deadline = time.monotonic() + timeout
+        # Wait in slices so Stop is not held up by a hung call
+        while not concurrent.futures.wait([future], min(0.05, max(0.0, deadline - time.monotonic()))).done:
+            if cancel_event.is_set():
+                future.cancel()
+                raise InterruptedError(errno.EINTR, "search cancelled", path)
+            if time.monotonic() >= deadline:
+                future.cancel()
+                with self._lock:
+                    self.timeouts_in_row += 1
+                raise TimeoutError(errno.ETIMEDOUT, f"took longer than {timeout:g} s", path)
+        with self._lock:
+            self.timeouts_in_row = 0
+        return future.result()
+
+    def _work(self, tasks):
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            future, function, path = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(path))
+                except BaseException as e:
+                    future.set_exception(e)
+            with self._lock:
+                if tasks is self._tasks:
+                    self._idle += 1
+
+    def shutdown(self):
+        """Stop the idle threads. Hung threads end on their own once their call returns"""
+        with self._lock:
+            stale, self._tasks = self._tasks, queue.Queue()
+            for _ in range(self._threads):
+                stale.put(None)
+            self._threads = self._idle = 0
+
+
+class ScanQueue(queue.Queue):
+    """Folders waiting to be scanned, handed out in the given order.
+
+    "depth" returns the most recently queued folder first, like a recursive
+    walk. "breadth" returns the oldest, so the tree is scanned level by
+    level. "priority" returns the folder with the lowest key(path, depth)
+    first and otherwise the oldest. Items are (path, depth, st_dev,
+    matcher) tuples, None stops a scanner thread.
+    """
+
+    ORDERS = ("depth", "breadth", "priority")
+    # The order of the recursive walk, used by every front end unless another order is picked
+    DEFAULT_ORDER = "depth"
+
+    def __init__(self, order=DEFAULT_ORDER, key=None):
+        if order not in self.ORDERS:
+            raise ValueError(f"unknown scan order: {order}")
+        self.order = order
+        self.key = key
+        self._sequence = 0
+        super().__init__()
+
+    def _init(self, maxsize):
+        self.queue = collections.deque() if self.order == "breadth" else []
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def _put(self, item):
+        if self.order == "priority":
+            # The stop item sorts after every folder
+            key = self.key(item[0], item[1]) if item is not None else (float("inf"),)
+            heapq.heappush(self.queue, (key, self._sequence, item))
+            self._sequence += 1
+        else:
+            self.queue.append(item)
+
+    def _get(self):
+        if self.order == "priority":
+            return heapq.heappop(self.queue)[2]
+        return self.queue.pop() if self.order == "depth" else self.queue.popleft()
+
+    def put_all(self, items):
+        """Queue items so that, among themselves, the first is handed out first"""
+        for item in reversed(items) if self.order == "depth" else items:
+            self.put(item)
+
+
+class SearchEngine:
+    """Folder search without any Tk dependency.
+
+    Iterate over search() to receive SearchMatch objects as soon as they are
+    found. cancel() may be called from any thread to stop the search early.
+    Directories whose name matches the keyword are reported but not descended.
+    """
+
+    SORT_KEYS = ("size", "date", "name")
+
+    def __init__(self, root, keyword, max_depth=10, max_results=1000, categories=None,
+                 progress_callback=None, progress_interval=100, workers=1, index=None,
+                 follow_symlinks=False, patterns=None, cache=None, extra_roots=None,
+                 processes=1, split_top_level=False, collect_stat=False, content=None, filters=None, sort=None,
+                 excludes=None, order=ScanQueue.DEFAULT_ORDER, archives=None, backend=None,
+                 dir_timeout=None):
+        self.root = root
+        self.keyword = keyword.strip().lower()
+        self.patterns = list(patterns or [])
+        if self.patterns and content is not None:
+            raise ValueError("content search takes a single text, not batch patterns")
+        if self.patterns:
+            # A batch query is answered in one traversal, a folder matching some patterns is searched for the rest
+            self.matcher = QueryMatcher.for_patterns(self.patterns)
+            self.patterns = self.matcher.labels
+        else:
+            self.matcher = QueryMatcher.for_keyword(keyword)
+        self.max_depth = max_depth
+        self.max_results = max_results
+        self.categories = list(categories or [])
+        self.classifier = CategoryClassifier(self.categories, root)
+
+        # Called with the number of processed entries every progress_interval entries
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+
+        # Number of scanner threads, 1 walks the tree on the calling thread
+        self.workers = max(1, workers)
+        self.index = index
+        self.follow_symlinks = follow_symlinks
+        if sort is not None and sort not in self.SORT_KEYS:
+            raise ValueError(f"unknown sort key: {sort}")
+        self.filters = filters or None
+        self.sort = sort
+        # Matches carry size and mtime from their DirEntry, free on Windows and one stat call per match
+        # elsewhere. Filters and sorting read them too
+        self.collect_stat = collect_stat or bool(self.filters and self.filters.needs_stat) or sort in ("size", "date")
+        self.content = content
+        # Excluded entries are neither matched nor descended into
+        self.excludes = excludes or None
+        if order not in ScanQueue.ORDERS:
+            raise ValueError(f"unknown scan order: {order}")
+        self.order = order
+        self.archives = archives
+        self.backend = backend or LocalBackend()
+        # Seconds a folder listing may take, None waits forever
+        self.dir_timeout = dir_timeout or None
+        # Runs the timed filesystem calls, shared with the engines searching other roots for this one
+        self._listings = ListingPool(self.workers + 16) if self.dir_timeout else None
+        # With a filter, the walk yields the files it accepts instead of name matches
+        self.file_filter = content
+
+        # Multi-root and process pool sharding
+        self.roots = [root] + [extra for extra in (extra_roots or []) if extra != root]
+        self.processes = max(1, processes)
+        self.split_top_level = split_top_level
+
+        # (path, depth) of the folders the walk starts from
+        self.start_dirs = [(root, 0)]
+        self.cache = cache
+        # "hit", "refined" or "miss" once search() was called with a cache
+        self.cache_status = None
+
+        # (st_dev, st_ino) of every folder queued for scanning
+        self._visited = set()
+        self._visited_lock = threading.Lock()
+
+        self.processed_count = 0
+        self.total_found = 0
+        # Number of matches the sorted ones were picked from
+        self.sorted_from = 0
+        self.stats = SearchStats()
+        self._count_lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        # Set when the consumer stops iterating so scanner threads wind down
+        self._halt_event = threading.Event()
+
+    def cancel(self):
+        """Ask the search to stop as soon as possible"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def is_finished(self):
+        """True once the search was cancelled or reached max_results"""
+        return (self._cancel_event.is_set() or self._halt_event.is_set()
+                or self.total_found >= self.max_results)
+
+    def __iter__(self):
+        return self.search()
+
+    def search(self):
+        """Yield matches until the tree is exhausted, max_results is reached or the search is cancelled"""
+        if self.cache is not None:
+            return self._measured(self._search_cached())
+        return self._measured(self._search_uncached())
+
+    def _measured(self, source):
+        try:
+            for match in source:
+                self.stats.record_match()
+                yield match
+        finally:
+            source.close()
+            if self._listings is not None:
+                self._listings.shutdown()
+            self.stats.finish()
+
+    def profile(self):
+        """Return the search settings and the SearchStats counters and timings as a JSON-ready dict"""
+        return {
+            "roots": self.roots,
+            "keyword": self.keyword,
+            "patterns": self.patterns,
+            "max_depth": self.max_depth,
+            "max_results": self.max_results,
+            "categories": self.categories,
+            "workers": self.workers,
+            "processes": self.processes,
+            "follow_symlinks": self.follow_symlinks,
+            "filters": self.filters.key() if self.filters else None,
+            "sort": self.sort,
+            "excludes": self.excludes.key() if self.excludes else None,
+            "order": self.order,
+            "archives": self.archives is not None,
+            "backend": type(self.backend).__name__,
+            "dir_timeout": self.dir_timeout,
+            "source": "index" if self.uses_index() else "walk",
+            "cache_status": self.cache_status,
+            "cancelled": self.cancelled,
+            "total_found": self.total_found,
+            "stats": self.stats.snapshot(),
+        }
+
+    def _search_uncached(self):
+        if self.sort:
+            return self._search_sorted(self._search_unsorted())
+        return self._search_unsorted()
+
+    def _sort_key(self, match):
+        if self.sort == "name":
+            return os.path.basename(match.path).lower()
+        # Folder sizes are only the size of their listing, they sort after all files
+        value = match.mtime if self.sort == "date" else None if match.is_dir else match.size
+        return value if value is not None else -1
+
+    def _search_sorted(self, source):
+        """Keep the top max_results matches of source in a bounded heap and yield them in order.
+
+        The order is the largest, the newest or the first by name. The walk
+        is not stopped, max_results only limits the number of sorted matches.
+        """
+        select = heapq.nsmallest if self.sort == "name" else heapq.nlargest
+        # The walk must see every match, so max_results only limits the heap
+        limit, self.max_results = self.max_results, sys.maxsize
+        try:
+            best = select(limit, source, key=self._sort_key)
+        finally:
+            self.max_results = limit
+        self.sorted_from, self.total_found = self.total_found, 0
+        for match in best:
+            self.total_found += 1
+            yield match
+
+    def _search_unsorted(self):
+        # An index covering every root answers faster than any walk, and worker processes cannot use it
+        if self.processes > 1 and not self.uses_index():
+            return self._search_processes()
+        if len(self.roots) > 1:
+            return self._search_roots()
+        if self.uses_index():
+            return self._search_index()
+        if self.content is not None:
+            return self._search_content()
+        if self.workers > 1:
+            return self._search_parallel()
+        return self._search_sequential()
+
+    def cache_key(self):
+        """Everything except max_results that determines the answer of this search"""
+        return (tuple(os.path.normpath(root) for root in self.roots), self.keyword, tuple(self.patterns), self.max_depth,
+                tuple(self.categories), self.follow_symlinks, self.content.key() if self.content else None,
+                self.filters.key() if self.filters else None, self.sort,
+                self.excludes.key() if self.excludes else None, self.order, self.archives is not None)
+
+    def root_of(self, path):
+        """Return the searched root that contains path"""
+        for root in self.roots:
+            prefix = root if root.endswith(os.sep) else root + os.sep
+            if path.startswith(prefix):
+                return root
+        return self.root
+
+    def _child_options(self):
+        """Keyword arguments to run the same query on another root or in a worker process"""
+        return dict(keyword=self.keyword, patterns=self.patterns, max_depth=self.max_depth,
+                    max_results=self.max_results, categories=self.categories, workers=self.workers,
+                    index=self.index, follow_symlinks=self.follow_symlinks, collect_stat=self.collect_stat, content=self.content,
+                    filters=self.filters, excludes=self.excludes, order=self.order, archives=self.archives,
+                    backend=self.backend, dir_timeout=self.dir_timeout)
+
+    def _search_roots(self):
+        """Search every root in turn on this thread"""
+        for root in self.roots:
+            if self.is_finished():
+                return
+            child = SearchEngine(root, **self._child_options())
+            # Share the cancel flag so cancel() stops the child too, and the statistics
+            child._cancel_event = self._cancel_event
+            child.stats = self.stats
+            child._listings = self._listings
+            offset = self.processed_count
+            if self.progress_callback:
+                child.progress_callback = lambda count, offset=offset: self.progress_callback(offset + count)
+            child.progress_interval = self.progress_interval
+            try:
+                for match in child._search_uncached():
+                    self.total_found += 1
+                    yield match
+                    if self.is_finished():
+                        return
+            finally:
+                child._halt_event.set()
+                self.processed_count = offset + child.processed_count
+
+    def _shards(self):
+        """Yield matches of root level entries when splitting, and return the list of shards.
+
+        A shard is (root, path, depth, active pattern indices) and is searched by one worker process.
+        """
+        shards = []
+        for root in self.roots:
+            if not self.split_top_level or self.max_depth < 1:
+                shards.append((root, root, 0, None))
+                continue
+
+            try:
+                st = self._stat_root(root)
+            except (OSError, ValueError):
+                continue
+            # Root level entries are cheap, scan them here and hand each subfolder to the pool
+            subdirs = []
+            root_classifier, self.classifier = self.classifier, CategoryClassifier(self.categories, root)
+            try:
+                for match in self._scan_directory(root, 0, st.st_dev, self.matcher, subdirs):
+                    # Content search: root level files are read right here
+                    if self.content is not None and not self._read_candidate(match):
+                        continue
+                    self.total_found += 1
+                    yield match
+                    if self.is_finished():
+                        return shards
+            finally:
+                self.classifier = root_classifier
+            for path, _, matcher in subdirs:
+                shards.append((root, path, 1, matcher.indices))
+        return shards
+
+    def _search_processes(self):
+        """Scan the shards in a pool of worker processes and merge the streamed matches.
+
+        The shards are the roots, or with split_top_level their top level
+        folders. max_results and cancel() apply across all processes. The
+        visited set is per shard, so with follow_symlinks a folder linked
+        from two shards is reported from both.
+        """
+        shards = yield from self._shards()
+        if not shards or self.is_finished():
+            return
+
+        context = multiprocessing.get_context("spawn")
+        tasks = context.Queue()
+        # Bounded, so workers wait for a slow consumer instead of piling up batches
+        results = context.Queue(maxsize=4 * min(self.processes, len(shards)))
+        stop_event = context.Event()
+        for shard in shards:
+            tasks.put(shard)
+        process_count = min(self.processes, len(shards))
+        for _ in range(process_count):
+            tasks.put(None)
+
+        # The index only answers whole roots, and its connection stays in this process
+        options = dict(self._child_options(), index=None)
+        processes = [context.Process(target=_shard_worker, args=(options, tasks, results, stop_event),
+                                     daemon=True) for _ in range(process_count)]
+        for process in processes:
+            process.start()
+
+        finished = 0
+        try:
+            while finished < process_count:
+                try:
+                    kind, payload, processed = results.get(timeout=0.1)
+                except queue.Empty:
+                    if self._cancel_event.is_set():
+                        return
+                    if not any(process.is_alive() for process in processes) and results.empty():
+                        # A worker died without reporting back, the matches of its shard are missing
+                        exit_codes = [process.exitcode for process in processes if process.exitcode]
+                        for index in range(process_count - finished):
+                            code = exit_codes[index] if index < len(exit_codes) else None
+                            self.stats.record_error(ChildProcessError(f"worker process failed (exit code {code})"))
+                        return
+                    continue
+
+                if processed:
+                    self._count_processed(processed)
+                if kind == "done":
+                    self.stats.merge(payload)
+                    finished += 1
+                    continue
+                for fields in payload:
+                    if self.is_finished():
+                        return
+                    self.total_found += 1
+                    yield SearchMatch(*fields)
+        finally:
+            # Tell the workers to stop, give them a moment and then make sure they are gone
+            stop_event.set()
+            deadline = time.monotonic() + 1.0
+            for process in processes:
+                process.join(max(0.0, deadline - time.monotonic()))
+                if process.is_alive():
+                    process.terminate()
+            tasks.cancel_join_thread()
+            results.cancel_join_thread()
+
+    def _search_cached(self):
+        """Answer recent searches from the SearchCache, or walk and store the results.
+
+        A keyword that narrows a cached keyword filters the cached matches and
+        only walks the matched folders the earlier search skipped.
+        """
+        plan = self.cache.plan(self)
+        if plan is None:
+            self.cache_status = "miss"
+            source = self._search_uncached()
+        else:
+            self.cache_status, cached_matches, rescan_dirs = plan
+            source = self._search_refined(cached_matches, rescan_dirs)
+
+        # Remember what we yield so the result can be cached once the search completes. A hit is cached already
+        collected = ResultStore() if self.cache_status != "hit" else None
+        for match in source:
+            if collected is not None:
+                row = collected.append(match)
+                if row % 1024 == 0 and not self.cache.fits(collected):
+                    collected = None
+            yield match
+
+        # Only reached when the source was exhausted, a consumer that stops iterating never gets here
+        if collected is not None and not self._cancel_event.is_set():
+            self.cache.store(self, collected, complete=self.total_found < self.max_results)
+
+    def _search_refined(self, cached_matches, rescan_dirs):
+        """Yield cached matches, then walk the folders the cached search did not descend into"""
+        for match in cached_matches:
+            if self.is_finished():
+                return
+            self.total_found += 1
+            yield match
+
+        if rescan_dirs and not self.is_finished():
+            self.start_dirs = rescan_dirs
+            yield from self._search_sequential() if self.workers == 1 else self._search_parallel()
+
+    def uses_index(self):
+        """True if the query will be answered from the persistent index"""
+        # The index is built without following symlinks and only answers single keywords
+        return (self.index is not None and not self.follow_symlinks and not self.patterns and self.content is None
+                and not self.filters and not self.sort and self.archives is None
+                and all(self.index.covering_root(root) is not None for root in self.roots))
+
+    def _search_index(self):
+        """Answer the query from the FileIndex covering root instead of walking the folder"""
+        for match in self.index.search(self.root, self.keyword, self.max_depth, self.max_results,
+                                       self.categories, self._cancel_event, self.excludes):
+            self.total_found += 1
+            yield match
+            if self.is_finished():
+                return
+
+    def files(self, file_filter):
+        """Yield an unclassified SearchMatch with size and mtime for every file below the roots accepted by file_filter.
+
+        file_filter.accepts(name, size) is asked first with size None, before the file is stat'ed, then with its size.
+        """
+        for root in self.roots:
+            if self.is_finished():
+                return
+            lister = SearchEngine(root, **dict(self._child_options(), max_results=sys.maxsize, content=None))
+            lister.file_filter = file_filter
+            lister.stats = self.stats
+            lister._cancel_event = self._cancel_event
+            yield from lister._search_parallel() if self.workers > 1 else lister._search_sequential()
+
+    def _read_candidate(self, candidate):
+        """Search the contents of a candidate file, fill in its category and first hit and return True on a hit"""
+        try:
+            found = self.content.search_file(candidate.path, self.stats, self.is_finished)
+        except OSError as e:
+            self.stats.record_error(e)
+            return False
+        if not found:
+            return False
+        candidate.category = self.classifier.classify(candidate.path)
+        candidate.content = found
+        return True
+
+    def _search_content(self):
+        """List the candidate files with the normal walk and search their contents in a pool of reader threads.
+
+        Every hit records its first matching line.
+        """
+        lister = SearchEngine(self.root, **dict(self._child_options(), max_results=sys.maxsize))
+        lister.start_dirs = self.start_dirs
+        lister.stats = self.stats
+        lister._cancel_event = self._cancel_event
+        lister._listings = self._listings
+
+        candidates = queue.Queue(maxsize=self.content.readers * 64)
+        hits = queue.Queue()
+        done = object()
+
+        def walker():
+            source = lister._search_parallel() if self.workers > 1 else lister._search_sequential()
+            try:
+                for candidate in source:
+                    # Wait while the readers are busy, but stop once the search is finished
+                    while not self.is_finished():
+                        try:
+                            candidates.put(candidate, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if self.is_finished():
+                        break
+            finally:
+                source.close()
+                for _ in threads:
+                    candidates.put(None)
+
+        def reader():
+            while True:
+                candidate = candidates.get()
+                if candidate is None:
+                    hits.put(done)
+                    return
+                # Once finished, keep draining without reading
+                if not self.is_finished() and self._read_candidate(candidate):
+                    hits.put(candidate)
+
+        threads = [threading.Thread(target=reader, daemon=True) for _ in range(self.content.readers)]
+        for thread in threads:
+            thread.start()
+        threading.Thread(target=walker, daemon=True).start()
+
+        finished = 0
+        try:
+            while finished < len(threads):
+                try:
+                    hit = hits.get(timeout=0.1)
+                except queue.Empty:
+                    if self._cancel_event.is_set():
+                        return
+                    continue
+                if hit is done:
+                    finished += 1
+                    continue
+                if self.is_finished():
+                    return
+                self.total_found += 1
+                yield hit
+        finally:
+            self._halt_event.set()
+
+    def _start_directories(self):
+        """Return the (path, depth, st_dev, matcher) work items for start_dirs that can be read"""
+        items = []
+        for path, depth in self.start_dirs:
+            try:
+                st = self._stat_root(path)
+            except (OSError, ValueError):
+                continue
+            if self._mark_visited((st.st_dev, st.st_ino)):
+                items.append((path, depth, st.st_dev, self.matcher))
+        return items
+
+    def _scan_queue(self):
+        """Folders waiting to be scanned, in the depth, breadth or priority order of the search"""
+        return ScanQueue(self.order, self._scan_priority)
+
+    def _scan_priority(self, path, depth):
+        """Priority order key of a queued folder: folders in a category first, then the shallower ones"""
+        return (not self.classifier.in_category(path), depth)
+
+    def _search_sequential(self):
+        # Explicit queue instead of recursion: (path, depth, st_dev, matcher)
+        pending = self._scan_queue()
+        pending.put_all(self._start_directories())
+
+        while pending.qsize() and not self.is_finished():
+            current_path, current_depth, current_dev, matcher = pending.get_nowait()
+
+            subdirs = []
+            for match in self._scan_directory(current_path, current_depth, current_dev, matcher, subdirs):
+                self.total_found += 1
+                yield match
+                if self.is_finished():
+                    return
+
+            # Subdirectories of one folder are visited in scandir order
+            pending.put_all([(subdir, current_depth + 1, dev, sub_matcher) for subdir, dev, sub_matcher in subdirs])
+
+    def _search_parallel(self):
+        """Hand the folders to a pool of scanner threads through a shared work queue.
+
+        The matches are the same as the sequential walk, only the order in
+        which they arrive differs.
+        """
+        pending = self._scan_queue()  # directories waiting for a scanner thread
+        # Lists of matches, one per scanned directory. Bounded, so scanners wait for a slow consumer
+        found = queue.Queue(maxsize=2 * self.workers)
+        done = object()
+
+        def scanner():
+            while True:
+                item = pending.get()
+                try:
+                    if item is None:
+                        return
+                    # Once finished, keep draining the queue without scanning
+                    if self.is_finished():
+                        continue
+
+                    current_path, current_depth, current_dev, matcher = item
+                    subdirs = []
+                    matches = list(self._scan_directory(current_path, current_depth, current_dev, matcher, subdirs))
+                    if matches and not self._offer(found, matches):
+                        continue
+                    pending.put_all([(subdir, current_depth + 1, dev, sub_matcher)
+                                     for subdir, dev, sub_matcher in subdirs])
+                finally:
+                    pending.task_done()
+
+        def supervisor():
+            # All directories are scanned once every queued item was marked done
+            pending.join()
+            for _ in threads:
+                pending.put(None)
+            self._offer(found, done)
+
+        starts = self._start_directories()
+        if not starts:
+            return
+        pending.put_all(starts)
+        threads = [threading.Thread(target=scanner, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        threading.Thread(target=supervisor, daemon=True).start()
+
+        try:
+            while True:
+                try:
+                    matches = found.get(timeout=0.1)
+                except queue.Empty:
+                    if self._cancel_event.is_set():
+                        return
+                    continue
+                if matches is done:
+                    return
+
+                for match in matches:
+                    if self.is_finished():
+                        return
+                    self.total_found += 1
+                    yield match
+        finally:
+            self._halt_event.set()
+
+    def _offer(self, target, item):
+        """Put item on the bounded queue target, False if the search finished while waiting for room"""
+        while True:
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self.is_finished():
+                    return False
+
+    def _mark_visited(self, key):
+        """Add a folder identity to the visited set, False if it was already there.
+
+        Every folder is scanned at most once, which also keeps follow_symlinks
+        from scanning a folder again through a link leading back into it.
+        """
+        with self._visited_lock:
+            if key in self._visited:
+                return False
+            self._visited.add(key)
+            return True
+
+    def _directory_key(self, entry, parent_dev):
+        """Return (st_dev, st_ino) identifying the folder an entry refers to"""
+        st = entry.stat(follow_symlinks=self.follow_symlinks)
+        if st.st_ino:
+            return st.st_dev, st.st_ino
+        # Windows leaves st_ino empty in the scandir cache; inode() is the per volume file index
+        return parent_dev, entry.inode()
+
+    def _is_followable_dir(self, entry):
+        """True if the traversal should descend into entry"""
+        if not entry.is_dir(follow_symlinks=self.follow_symlinks):
+            return False
+        # Junctions are not symlinks to os.scandir but lead elsewhere just the same
+        if not self.follow_symlinks and getattr(entry, "is_junction", None) and entry.is_junction():
+            return False
+        return True
+
+    def _count_processed(self, count):
+        """Add to processed_count and report progress each time an interval boundary is crossed"""
+        with self._count_lock:
+            before = self.processed_count
+            self.processed_count += count
+            after = self.processed_count
+        if self.progress_callback and before // self.progress_interval != after // self.progress_interval:
+            self.progress_callback(after)
+
+    def _scan_archive(self, entry, depth, matcher, rel_dir):
+        """Yield the matching members of the archive at entry, as if it was a folder at depth - 1.
+
+        Members are matched, filtered and classified like regular entries and
+        reported at archive.zip!/inner/path. Content search and file listings
+        skip archives.
+        """
+        st = entry.stat()
+        started = time.perf_counter()
+        members = self.archives.members(entry.path, st.st_size, st.st_mtime)
+        self.stats.record_directory(entry.path, time.perf_counter() - started, len(members), 0.0)
+
+        labels = self.patterns
+        filters = self.filters
+        excludes = self.excludes
+        classifier = self.classifier
+        prefix = entry.path + "!"
+        # Matcher of every member folder that is searched, by inner path
+        matchers = {"": matcher}
+        for inner_path, is_dir, size, mtime in members:
+            if self._cancel_event.is_set():
+                return
+            parent, _, name = inner_path.rpartition("/")
+            folder_matcher = matchers.get(parent)
+            if folder_matcher is None:
+                # Below a matched, excluded or too deep member folder
+                continue
+            if excludes and excludes.excluded(rel_dir + inner_path, is_dir):
+                continue
+
+            member_depth = depth + inner_path.count("/")
+            matched = folder_matcher.match(name)
+            if matched and filters and not (filters.accepts_name(name, is_dir) and (
+                    not filters.needs_stat
+                    or (mtime is not None and filters.accepts_stat(size or 0, mtime, is_dir)))):
+                matched = ()
+            if matched:
+                dir_path = prefix + "/" + parent if parent else prefix
+                yield SearchMatch(prefix + "/" + inner_path, classifier.classify_entry(dir_path, name), is_dir,
+                                  member_depth, tuple(labels[index] for index in matched) if labels else (),
+                                  size, mtime)
+            if is_dir and member_depth < self.max_depth:
+                sub_matcher = folder_matcher.without(matched) if matched else folder_matcher
+                if sub_matcher is not None:
+                    matchers[inner_path] = sub_matcher
+
+    def _open_directory(self, path):
+        """Return a context manager over the entries of path, raising TimeoutError after dir_timeout seconds.
+
+        With dir_timeout the listing runs on the ListingPool, so a hung share
+        cannot freeze the search.
+        """
+        if self._listings is None:
+            return self.backend.scandir(path)
+        try:
+            return contextlib.nullcontext(self._listings.call(self._list_directory, path, self.dir_timeout,
+                                                              self._cancel_event))
+        except InterruptedError:
+            return contextlib.nullcontext([])
+
+    def _list_directory(self, path):
+        with self.backend.scandir(path) as entries:
+            return list(entries)
+
+    def _stat_root(self, path):
+        """Stat a folder the walk starts from, with the same dir_timeout as the folder listings"""
+        if self._listings is None:
+            return self.backend.stat(path)
+        try:
+            return self._listings.call(self.backend.stat, path, self.dir_timeout, self._cancel_event)
+        except TimeoutError as e:
+            self.stats.record_error(e, path)
+            raise
+
+    def _relative_dir(self, path):
+        """path relative to root with / separators and a trailing /, empty for root itself"""
+        prefix = self.root if self.root.endswith(os.sep) else self.root + os.sep
+        if not path.startswith(prefix):
+            return ""
+        return path[len(prefix):].replace(os.sep, "/") + "/"
+
+    def _scan_directory(self, current_path, current_depth, current_dev, matcher, subdirs):
+        """Yield the matches directly inside current_path and collect (path, st_dev, matcher) of subdirectories to descend into"""
+        match_name = matcher.match
+        # A single keyword is tested inline, the hot path of every plain search
+        keyword = matcher.keyword
+        all_matched = matcher.indices
+        labels = self.patterns
+        classifier = self.classifier
+        follow_symlinks = self.follow_symlinks
+        collect_stat = self.collect_stat
+        filters = self.filters
+        file_filter = self.file_filter
+        excludes = self.excludes
+        rel_dir = self._relative_dir(current_path) if excludes else ""
+        archives = self.archives if file_filter is None and current_depth < self.max_depth else None
+        descend = current_depth < self.max_depth
+        processed = 0
+        scanned = 0
+        excluded = 0
+        classify_seconds = 0.0
+        # Time spent by the consumer between yields is not part of the scan
+        paused = 0.0
+        started = time.perf_counter()
+        try:
+            with self._open_directory(current_path) as entries:
+                for entry in entries:
+                    if self._cancel_event.is_set():
+                        return
+
+                    processed += 1
+                    scanned += 1
+                    if processed == self.progress_interval:
+                        self._count_processed(processed)
+                        processed = 0
+
+                    try:
+                        if excludes and excludes.excluded(rel_dir + entry.name,
+                                                          entry.is_dir(follow_symlinks=follow_symlinks)):
+                            # Neither reported nor descended into
+                            excluded += 1
+                            continue
+
+                        sub_matcher = matcher
+                        if file_filter is not None:
+                            # Listing files: yield the accepted files unclassified and search every folder
+                            matched = ()
+                            if not entry.is_dir(follow_symlinks=follow_symlinks):
+                                if (file_filter.accepts(entry.name, None)
+                                        and entry.is_file(follow_symlinks=follow_symlinks)):
+                                    st = entry.stat(follow_symlinks=follow_symlinks)
+                                    if file_filter.accepts(entry.name, st.st_size) and (
+                                            not filters or (filters.accepts_name(entry.name, False)
+                                                            and filters.accepts_stat(st.st_size, st.st_mtime, False))):
+                                        yield_started = time.perf_counter()
+                                        yield SearchMatch(entry.path, None, False, current_depth, (),
+                                                          st.st_size, st.st_mtime)
+                                        paused += time.perf_counter() - yield_started
+                                continue
+                        else:
+                            # Check if item name contains keyword (case-insensitive)
+                            if keyword is not None:
+                                matched = all_matched if keyword in entry.name.lower() else ()
+                            else:
+                                matched = match_name(entry.name)
+                        if matched:
+                            is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+                            size = mtime = None
+                            if collect_stat:
+                                try:
+                                    st = entry.stat(follow_symlinks=follow_symlinks)
+                                    size, mtime = st.st_size, st.st_mtime
+                                except OSError:
+                                    # Broken links are still reported, unless size or time are filtered on
+                                    pass
+                            if filters and not (filters.accepts_name(entry.name, is_dir) and (
+                                    not filters.needs_stat
+                                    or (size is not None and filters.accepts_stat(size, mtime, is_dir)))):
+                                # Not reported, so a filtered out folder is searched like any other
+                                matched = ()
+
+                        if matched:
+                            # Found a match - classify (or put in "All Results" if no categories defined)
+                            classify_started = time.perf_counter()
+                            category = classifier.classify_entry(current_path, entry.name)
+                            yield_started = time.perf_counter()
+                            classify_seconds += yield_started - classify_started
+                            yield SearchMatch(entry.path, category, is_dir, current_depth,
+                                              tuple(labels[index] for index in matched) if labels else (),
+                                              size, mtime)
+                            paused += time.perf_counter() - yield_started
+
+                            # Don't search inside matched directories for the patterns they matched
+                            sub_matcher = matcher.without(matched)
+                            if sub_matcher is None:
+                                continue
+
+                        if archives is not None and archives.is_archive(entry.name) and entry.is_file():
+                            yield_started = time.perf_counter()
+                            yield from self._scan_archive(entry, current_depth + 1, sub_matcher,
+                                                          rel_dir + entry.name + "/")
+                            paused += time.perf_counter() - yield_started
+                            continue
+
+                        # If it's a directory, continue searching inside
+                        if descend and self._is_followable_dir(entry):
+                            key = self._directory_key(entry, current_dev)
+                            # Skip folders already reached through another link
+                            if self._mark_visited(key):
+                                subdirs.append((entry.path, key[0], sub_matcher))
+
+                    except (PermissionError, OSError, FileNotFoundError) as e:
+                        # Skip files/folders we can't access
+                        self.stats.record_error(e, entry.path)
+                        continue
+
+        except (PermissionError, OSError, FileNotFoundError) as e:
+            self.stats.record_error(e, current_path)
+            started = None
+            return
+        finally:
+            if processed:
+                self._count_processed(processed)
+            if started is not None:
+                self.stats.record_directory(current_path, time.perf_counter() - started - paused,
+                                            scanned, classify_seconds, excluded)
+
+
+def _shard_worker(options, tasks, results, stop_event):
+    """Worker process for SearchEngine: search shards from tasks and stream matches to results"""
+    current = [None]
+
+    def watch_stop():
+        # Poll instead of stop_event.wait(): a waiter that exits without waking up would block set()
+        while not stop_event.is_set():
+            time.sleep(0.05)
+        if current[0] is not None:
+            current[0].cancel()
+
+    threading.Thread(target=watch_stop, daemon=True).start()
+    # One set of statistics for every shard of this worker, merged by the parent when done
+    stats = SearchStats()
+    listings = None
+
+    while not stop_event.is_set():
+        task = tasks.get()
+        if task is None:
+            break
+        root, path, depth, indices = task
+        engine = SearchEngine(root, **options)
+        engine.start_dirs = [(path, depth)]
+        engine.stats = stats
+        # Timeouts in a row count across the shards of this worker
+        if listings is None:
+            listings = engine._listings
+        engine._listings = listings
+        if indices is not None and tuple(indices) != engine.matcher.indices:
+            engine.matcher = engine.matcher.without(set(engine.matcher.indices) - set(indices))
+        current[0] = engine
+        if stop_event.is_set():
+            break
+
+        # Send matches in batches so the queue is not hammered with tiny messages
+        batch = []
+        reported = 0
+        last_send = time.monotonic()
+        for match in engine.search():
+            batch.append((match.path, match.category, match.is_dir, match.depth, match.patterns,
+                          match.size, match.mtime, match.content))
+            if len(batch) >= 256 or time.monotonic() - last_send > 0.1:
+                if not _send_result(results, ("matches", batch, engine.processed_count - reported), stop_event):
+                    return
+                reported = engine.processed_count
+                batch = []
+                last_send = time.monotonic()
+        if not _send_result(results, ("matches", batch, engine.processed_count - reported), stop_event):
+            return
+
+    _send_result(results, ("done", stats.snapshot(), 0), stop_event)
+
+
+def _send_result(results, item, stop_event):
+    """Put item on the bounded results queue of _shard_worker, False if the search stopped while waiting"""
+    while True:
+        try:
+            results.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            if stop_event.is_set():
+                return False
+
+
+class SearchCache:
+    """In-memory LRU cache of completed searches with a memory cap.
+
+    Entries are keyed by SearchEngine.cache_key() and hold the matches in
+    a ResultStore. Besides exact hits, a
+    keyword that contains a cached keyword under the same root is answered by
+    refinement: cached matches whose name contains the new keyword are kept,
+    and only cached folder matches that no longer match are walked, since the
+    earlier search did not descend into them. Entries expire after max_age
+    seconds because the folders may have changed since.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_age=300):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # key -> (matches, complete, size, stored_at)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def fits(self, matches):
+        """Check while collecting matches, so huge results are not kept around for nothing"""
+        return matches.nbytes() <= self.max_bytes
+
+    def _expire(self, now):
+        for key in [key for key, entry in self._entries.items() if now - entry[3] > self.max_age]:
+            self._size -= self._entries.pop(key)[2]
+
+    def plan(self, engine):
+        """Return (status, matches, rescan_dirs) to answer engine from the cache, or None on a miss"""
+        key = engine.cache_key()
+        with self._lock:
+            self._expire(time.time())
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                matches, complete, _, _ = entry
+                if complete or len(matches) >= engine.max_results:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return "hit", matches, []
+
+            # Refinement only works for single name keywords on a single root narrowing a complete earlier search,
+            # and never for sorted results, as the rescanned matches would come after the sorted ones, or
+            # archive searches, as matched archive folders cannot be rescanned on their own
+            if (not engine.patterns and engine.content is None and not engine.sort and engine.archives is None
+                    and engine.keyword and len(key[0]) == 1):
+                best = None
+                for other_key, (matches, complete, _, _) in self._entries.items():
+                    if (complete and other_key[2] == () and other_key[1] and other_key[1] in engine.keyword
+                            and other_key[0] == key[0] and other_key[3:] == key[3:]
+                            and (best is None or len(other_key[1]) > len(best[0][1]))):
+                        best = (other_key, matches)
+                if best is not None:
+                    self._entries.move_to_end(best[0])
+                    self.hits += 1
+                    return ("refined",) + self._refine(best[1], engine)
+
+            self.misses += 1
+            return None
+
+    @staticmethod
+    def _refine(matches, engine):
+        keyword = engine.keyword
+        kept = []
+        rescan_dirs = []
+        for row in range(len(matches)):
+            if keyword in matches.name(row).lower():
+                kept.append(matches.match(row))
+            elif matches.is_dir(row) and matches.depth(row) < engine.max_depth:
+                # The earlier search stopped at this folder because its name matched
+                rescan_dirs.append((matches.path(row), matches.depth(row) + 1))
+        return kept, rescan_dirs
+
+    def store(self, engine, matches, complete):
+        size = matches.nbytes()
+        if size > self.max_bytes:
+            return
+        key = engine.cache_key()
+        with self._lock:
+            if key in self._entries:
+                # Never replace a complete answer with a truncated one
+                if self._entries[key][1] and not complete:
+                    return
+                self._size -= self._entries.pop(key)[2]
+            self._entries[key] = (matches, complete, size, time.time())
+            self._size += size
+            # Evict least recently used entries until we are under the cap
+            while self._size > self.max_bytes:
+                self._size -= self._entries.popitem(last=False)[1][2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def describe(self):
+        return f"Cache: {self.hits} hits, {self.misses} misses, {len(self._entries)} searches, {self._size / (1024 * 1024):.1f} MB"
+
+
+class FileIndex:
+    """Persistent SQLite index of file and folder names below one or more roots.
+
+    refresh() only rescans directories whose mtime changed since the last
+    refresh, unchanged directories reuse their stored listing. search() answers
+    keyword queries from a trigram full text index when the SQLite build
+    supports it, and from a scan of the lowercased names otherwise.
+    """
+
+    def __init__(self, db_path=INDEX_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        self.has_trigram = False
+        self._setup()
+
+    def _connection(self):
+        # SQLite connections can't be shared between threads, keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _setup(self):
+        conn = self._connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS roots (
+                path TEXT PRIMARY KEY,
+                refreshed REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS dirs (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                mtime INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                dir INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                name_lower TEXT NOT NULL,
+                is_dir INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_dir ON entries(dir);
+        """)
+        try:
+            conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+                    name_lower, content='entries', content_rowid='id', tokenize='trigram');
+                CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+                    INSERT INTO entries_fts(rowid, name_lower) VALUES (new.id, new.name_lower);
+                END;
+                CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+                    INSERT INTO entries_fts(entries_fts, rowid, name_lower) VALUES ('delete', old.id, old.name_lower);
+                END;
+            """)
+            self.has_trigram = True
+        except sqlite3.OperationalError:
+            # SQLite older than 3.34 has no trigram tokenizer, fall back to scanning names
+            self.has_trigram = False
+        conn.commit()
+
+    @staticmethod
+    def _normalize(path):
+        return os.path.normpath(os.path.abspath(path))
+
+    @staticmethod
+    def _subtree_bounds(root):
+        """Return (low, high) so that every path below root satisfies low <= path < high"""
+        prefix = root if root.endswith(os.sep) else root + os.sep
+        return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    def covering_root(self, path):
+        """Return the indexed root that contains path, or None if path is not indexed"""
+        path = self._normalize(path)
+        for (root,) in self._connection().execute("SELECT path FROM roots"):
+            low, _ = self._subtree_bounds(root)
+            if path == root or path.startswith(low):
+                return root
+        return None
+
+    def info(self, path):
+        """Return (entry_count, size_in_bytes, refreshed_timestamp) for the root covering path"""
+        root = self.covering_root(path)
+        if root is None:
+            return None
+        conn = self._connection()
+        refreshed = conn.execute("SELECT refreshed FROM roots WHERE path = ?", (root,)).fetchone()[0]
+        low, high = self._subtree_bounds(root)
+        count = conn.execute(
+            "SELECT COUNT(*) FROM entries JOIN dirs ON dirs.id = entries.dir "
+            "WHERE dirs.path = ? OR (dirs.path >= ? AND dirs.path < ?)", (root, low, high)).fetchone()[0]
+        try:
+            size = os.path.getsize(self.db_path)
+        except OSError:
+            size = 0
+        return count, size, refreshed
+
+    def describe(self, path):
+        """Human readable summary of the index age and size for the status label"""
+        info = self.info(path)
+        if info is None:
+            return "Folder is not indexed."
+        count, size, refreshed = info
+        return f"Index: {count:,} entries, {size / (1024 * 1024):.1f} MB, refreshed {format_age(time.time() - refreshed)} ago"
+
+    def refresh(self, root, cancel_event=None, progress_callback=None, register_root=True):
+        """Bring the index for root up to date, rescanning only directories whose mtime changed.
+
+        Returns (directories_checked, rescanned_paths). With register_root
+        False, root is refreshed as a subtree of an already indexed root.
+        """
+        root = self._normalize(root)
+        conn = self._connection()
+        low, high = self._subtree_bounds(root)
+
+        known = {}
+        for dir_id, path, mtime in conn.execute(
+                "SELECT id, path, mtime FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (root, low, high)):
+            known[path] = (dir_id, mtime)
+
+        checked = 0
+        rescanned = []
+        seen = set()
+        stack = [root]
+        while stack:
+            if cancel_event is not None and cancel_event.is_set():
+                conn.commit()
+                return checked, rescanned
+
+            current_path = stack.pop()
+            seen.add(current_path)
+            checked += 1
+            if progress_callback and checked % 500 == 0:
+                progress_callback(checked, len(rescanned))
+
+            try:
+                mtime = os.stat(current_path).st_mtime_ns
+            except (PermissionError, OSError, FileNotFoundError):
+                continue
+
+            dir_id, known_mtime = known.get(current_path, (None, None))
+            if dir_id is not None and known_mtime == mtime:
+                # Unchanged directory: its children are still the ones we stored
+                for (name,) in conn.execute("SELECT name FROM entries WHERE dir = ? AND is_dir = 1", (dir_id,)):
+                    stack.append(os.path.join(current_path, name))
+                continue
+
+            listing = []
+            try:
+                with os.scandir(current_path) as entries:
+                    for entry in entries:
+                        try:
+                            listing.append((entry.name, entry.is_dir(follow_symlinks=False)))
+                        except OSError:
+                            continue
+            except (PermissionError, OSError, FileNotFoundError):
+                continue
+
+            rescanned.append(current_path)
+            dir_id = self._store_listing(conn, current_path, dir_id, mtime, listing)
+            stack.extend(os.path.join(current_path, name) for name, is_dir in listing if is_dir)
+            if len(rescanned) % 1000 == 0:
+                conn.commit()
+
+        # Anything we knew about but did not reach any more was deleted or moved away
+        for path, (dir_id, _) in known.items():
+            if path not in seen:
+                conn.execute("DELETE FROM entries WHERE dir = ?", (dir_id,))
+                conn.execute("DELETE FROM dirs WHERE id = ?", (dir_id,))
+
+        if register_root:
+            self.mark_refreshed(root)
+        conn.commit()
+        return checked, rescanned
+
+    def mark_refreshed(self, root):
+        """Record that the index of root is current as of now"""
+        self._connection().execute(
+            "INSERT OR REPLACE INTO roots (path, refreshed) VALUES (?, ?)", (self._normalize(root), time.time()))
+
+    def commit(self):
+        self._connection().commit()
+
+    def _dir_id(self, conn, path):
+        row = conn.execute("SELECT id FROM dirs WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def _sync_mtime(self, conn, path, dir_id):
+        # Keep the stored mtime current so the next refresh doesn't rescan a directory we already updated
+        try:
+            conn.execute("UPDATE dirs SET mtime = ? WHERE id = ?", (os.stat(path).st_mtime_ns, dir_id))
+        except OSError:
+            pass
+
+    def _delete_subtree(self, conn, path):
+        low, high = self._subtree_bounds(path)
+        where = "path = ? OR (path >= ? AND path < ?)"
+        conn.execute(f"DELETE FROM entries WHERE dir IN (SELECT id FROM dirs WHERE {where})", (path, low, high))
+        conn.execute(f"DELETE FROM dirs WHERE {where}", (path, low, high))
+
+    def add_entry(self, path, is_dir):
+        """Record a newly created file or folder. Returns False if its parent is not indexed.
+
+        Changes made by add_entry, remove_entry and move_entry are written on commit().
+        """
+        conn = self._connection()
+        parent, name = os.path.split(path)
+        dir_id = self._dir_id(conn, parent)
+        if dir_id is None:
+            return False
+        conn.execute("DELETE FROM entries WHERE dir = ? AND name = ?", (dir_id, name))
+        conn.execute("INSERT INTO entries (dir, name, name_lower, is_dir) VALUES (?, ?, ?, ?)",
+                     (dir_id, name, name.lower(), int(is_dir)))
+        self._sync_mtime(conn, parent, dir_id)
+        return True
+
+    def remove_entry(self, path):
+        """Forget a deleted file or folder, including everything indexed below it"""
+        conn = self._connection()
+        parent, name = os.path.split(path)
+        dir_id = self._dir_id(conn, parent)
+        if dir_id is not None:
+            conn.execute("DELETE FROM entries WHERE dir = ? AND name = ?", (dir_id, name))
+            self._sync_mtime(conn, parent, dir_id)
+        self._delete_subtree(conn, path)
+
+    def move_entry(self, old_path, new_path, is_dir):
+        """Apply a rename without rescanning, folders keep their indexed contents"""
+        conn = self._connection()
+        parent, name = os.path.split(old_path)
+        dir_id = self._dir_id(conn, parent)
+        if dir_id is not None:
+            conn.execute("DELETE FROM entries WHERE dir = ? AND name = ?", (dir_id, name))
+            self._sync_mtime(conn, parent, dir_id)
+        if is_dir:
+            # A folder renamed over an existing empty folder replaces it
+            self._delete_subtree(conn, new_path)
+            low, high = self._subtree_bounds(old_path)
+            conn.execute("UPDATE dirs SET path = ? || substr(path, ?) WHERE path = ? OR (path >= ? AND path < ?)",
+                         (new_path, len(old_path) + 1, old_path, low, high))
+        return self.add_entry(new_path, is_dir)
+
+    def _store_listing(self, conn, path, dir_id, mtime, listing):
+        """Replace the stored listing of one directory and return its id"""
+        if dir_id is None:
+            dir_id = conn.execute("INSERT INTO dirs (path, mtime) VALUES (?, ?)", (path, mtime)).lastrowid
+        else:
+            conn.execute("UPDATE dirs SET mtime = ? WHERE id = ?", (mtime, dir_id))
+            conn.execute("DELETE FROM entries WHERE dir = ?", (dir_id,))
+        conn.executemany(
+            "INSERT INTO entries (dir, name, name_lower, is_dir) VALUES (?, ?, ?, ?)",
+            [(dir_id, name, name.lower(), int(is_dir)) for name, is_dir in listing])
+        return dir_id
+
+    def search(self, root, keyword, max_depth=10, max_results=1000, categories=None, cancel_event=None,
+               excludes=None):
+        """Yield SearchMatch objects for indexed names under root, with the same rules as SearchEngine"""
+        root = self._normalize(root)
+        keyword = keyword.strip().lower()
+        classifier = CategoryClassifier(categories, root)
+        low, high = self._subtree_bounds(root)
+        conn = self._connection()
+
+        if self.has_trigram and len(keyword) >= 3:
+            phrase = '"' + keyword.replace('"', '""') + '"'
+            rows = conn.execute(
+                "SELECT dirs.path, entries.name, entries.is_dir FROM entries_fts "
+                "JOIN entries ON entries.id = entries_fts.rowid JOIN dirs ON dirs.id = entries.dir "
+                "WHERE entries_fts MATCH ? AND (dirs.path = ? OR (dirs.path >= ? AND dirs.path < ?))",
+                (phrase, root, low, high))
+        else:
+            rows = conn.execute(
+                "SELECT dirs.path, entries.name, entries.is_dir FROM entries JOIN dirs ON dirs.id = entries.dir "
+                "WHERE instr(entries.name_lower, ?) > 0 AND (dirs.path = ? OR (dirs.path >= ? AND dirs.path < ?))",
+                (keyword, root, low, high))
+
+        found = 0
+        for dir_path, name, is_dir in rows:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            if keyword not in name.lower():
+                continue
+
+            rel_parts = [] if dir_path == root else dir_path[len(low):].split(os.sep)
+            depth = len(rel_parts)
+            if depth > max_depth:
+                continue
+            # The live search never descends into matched directories
+            if any(keyword in part.lower() for part in rel_parts):
+                continue
+            # Excluded entries are indexed, but the live search never reaches them
+            if excludes and excludes.path_excluded(rel_parts, name, bool(is_dir)):
+                continue
+
+            yield SearchMatch(os.path.join(dir_path, name), classifier.classify_entry(dir_path, name),
+                              bool(is_dir), depth)
+            found += 1
+            if found >= max_results:
+                return
+
+
+class Inotify:
+    """Minimal ctypes binding to the Linux inotify API"""
+
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+                  | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        if platform.system() != "Linux":
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self, timeout):
+        """Return a list of (wd, mask, cookie, name) tuples, waiting at most timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        header_size = self._EVENT_HEADER.size
+        while offset + header_size <= len(data):
+            wd, mask, cookie, length = self._EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + header_size:offset + header_size + length].rstrip(b"\0")
+            events.append((wd, mask, cookie, os.fsdecode(name)))
+            offset += header_size + length
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class IndexWatcher:
+    """Keep the FileIndex of one root current in a background thread.
+
+    On Linux every indexed folder gets an inotify watch and creates, deletes
+    and renames are applied to the index as they happen. When inotify is not
+    available, or the watch limit is reached, the index is refreshed by
+    polling instead, which only rescans folders whose mtime changed.
+    """
+
+    def __init__(self, file_index, root, poll_interval=60, status_callback=None):
+        self.file_index = file_index
+        self.root = FileIndex._normalize(root)
+        self.poll_interval = poll_interval
+        self.status_callback = status_callback
+        self.mode = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._inotify = None
+        self._wd_paths = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _report(self, message):
+        if self.status_callback:
+            self.status_callback(message)
+
+    def _run(self):
+        try:
+            self._inotify = Inotify()
+            if not self._watch_tree(self.root):
+                raise OSError(errno.ENOSPC, "inotify watch limit reached")
+        except (OSError, AttributeError) as e:
+            if self._inotify:
+                self._inotify.close()
+            self._inotify = None
+            self.mode = "polling"
+            self._report(f"Watching {self.root} by polling every {self.poll_interval} s ({e}).")
+        else:
+            self.mode = "inotify"
+
+        try:
+            # Catch up with changes made while nothing was watching
+            self.file_index.refresh(self.root, cancel_event=self._stop_event)
+            if self.mode == "inotify":
+                self._report(f"Watching {self.root} for changes. {self.file_index.describe(self.root)}")
+                self._watch_loop()
+            else:
+                while not self._stop_event.wait(self.poll_interval):
+                    self.file_index.refresh(self.root, cancel_event=self._stop_event)
+        except sqlite3.Error as e:
+            self._report(f"Index watcher stopped: {e}")
+        finally:
+            if self._inotify:
+                self._inotify.close()
+
+    def _watch_tree(self, top):
+        """Add a watch to top and every folder below it. Returns False when the watch limit is hit"""
+        stack = [top]
+        while stack and not self._stop_event.is_set():
+            path = stack.pop()
+            try:
+                self._wd_paths[self._inotify.add_watch(path)] = path
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    return False
+                continue
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return True
+
+    def _watch_folders(self, paths):
+        """Add a watch to each folder in paths, without walking below them. Folders already watched keep their watch"""
+        for path in paths:
+            if self._stop_event.is_set():
+                return
+            try:
+                self._wd_paths[self._inotify.add_watch(path)] = path
+            except OSError:
+                continue
+
+    def _rename_watched(self, old_path, new_path):
+        low, _ = FileIndex._subtree_bounds(old_path)
+        for wd, path in self._wd_paths.items():
+            if path == old_path:
+                self._wd_paths[wd] = new_path
+            elif path.startswith(low):
+                self._wd_paths[wd] = new_path + path[len(old_path):]
+
+    def _watch_loop(self):
+        inotify = self._inotify
+        while not self._stop_event.is_set():
+            events = inotify.read_events(timeout=0.5)
+            if not events:
+                continue
+
+            moved_from = {}
+            new_dirs = []
+            for wd, mask, cookie, name in events:
+                if mask & Inotify.IN_Q_OVERFLOW:
+                    # Events were lost. The mtime check only rescans the folders that actually changed, and
+                    # folders created meanwhile are among them, so only those need a watch
+                    self._report("Change queue overflowed, catching up...")
+                    _, rescanned = self.file_index.refresh(self.root, cancel_event=self._stop_event)
+                    self._watch_folders(rescanned)
+                    continue
+                if mask & Inotify.IN_IGNORED:
+                    self._wd_paths.pop(wd, None)
+                    continue
+                if wd not in self._wd_paths:
+                    continue
+
+                parent = self._wd_paths[wd]
+                if mask & (Inotify.IN_DELETE_SELF | Inotify.IN_MOVE_SELF):
+                    if parent == self.root:
+                        self._report(f"{self.root} was removed, stopped watching.")
+                        self._stop_event.set()
+                    continue
+
+                path = os.path.join(parent, name)
+                is_dir = bool(mask & Inotify.IN_ISDIR)
+                if mask & Inotify.IN_CREATE:
+                    self.file_index.add_entry(path, is_dir)
+                    if is_dir:
+                        new_dirs.append(path)
+                elif mask & Inotify.IN_DELETE:
+                    self.file_index.remove_entry(path)
+                elif mask & Inotify.IN_MOVED_FROM:
+                    moved_from[cookie] = (path, is_dir)
+                elif mask & Inotify.IN_MOVED_TO:
+                    if cookie in moved_from:
+                        old_path, _ = moved_from.pop(cookie)
+                        self.file_index.move_entry(old_path, path, is_dir)
+                        if is_dir:
+                            self._rename_watched(old_path, path)
+                    else:
+                        # Moved in from outside the watched tree
+                        self.file_index.add_entry(path, is_dir)
+                        if is_dir:
+                            new_dirs.append(path)
+
+            # Moved out of the watched tree
+            for old_path, _ in moved_from.values():
+                self.file_index.remove_entry(old_path)
+
+            # New folders may already have contents by the time their watch is added
+            for path in new_dirs:
+                self._watch_tree(path)
+                self.file_index.refresh(path, cancel_event=self._stop_event, register_root=False)
+
+            self.file_index.mark_refreshed(self.root)
+            self.file_index.commit()
+
+
+class VirtualResultList:
+    """Results view that only materializes the rows currently on screen.
+
+    The results stay in their store. The Treeview holds a small pool of items,
+    one per visible row plus a buffer, and their text is refilled from the
+    store whenever the list scrolls or new results arrive. source must
+    provide result_groups() -> [(group, count)] in display order and
+    result_row(group, index) -> (display_text, path).
+    """
+
+    BUFFER_ROWS = 2
+
+    def __init__(self, parent, source, row_height):
+        self.source = source
+        self.row_height = row_height
+        self.tree = ttk.Treeview(parent, selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.on_scrollbar)
+
+        self.pool = []
+        self.visible_rows = 20
+        self.first_row = 0
+        self.total_rows = 0
+        self.selected_row = None
+        self.collapsed = set()
+        # (first row, group, count) for every group that has matches
+        self.layout = []
+        self.layout_starts = []
+
+        self.tree.bind("<Configure>", self.on_configure)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        for key, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"),
+                          ("<Home>", "home"), ("<End>", "end")):
+            self.tree.bind(key, lambda e, step=step: self.move_selection(step))
+
+    def reset(self):
+        self.first_row = 0
+        self.selected_row = None
+        self.collapsed.clear()
+        self.render()
+
+    def is_group(self, value):
+        return any(group == value for _, group, _ in self.layout)
+
+    def toggle_group(self, group):
+        """Collapse or expand the matches of one group"""
+        if group in self.collapsed:
+            self.collapsed.discard(group)
+        else:
+            self.collapsed.add(group)
+        self.render()
+
+    def build_layout(self):
+        layout = []
+        row = 0
+        for group, count in self.source.result_groups():
+            if not count:
+                continue
+            # Add spacing between sections
+            if layout:
+                row += 1
+            layout.append((row, group, count))
+            row += 1 if group in self.collapsed else count + 1
+        self.layout = layout
+        self.layout_starts = [start for start, _, _ in layout]
+        self.total_rows = row
+
+    def row_at(self, row):
+        """Return ("header" | "match" | "spacer", group, index) for a row of the flattened list"""
+        position = bisect.bisect_right(self.layout_starts, row) - 1
+        if position < 0:
+            return "spacer", None, 0
+        start, group, count = self.layout[position]
+        if row == start:
+            return "header", group, count
+        index = row - start - 1
+        if group not in self.collapsed and index < count:
+            return "match", group, index
+        return "spacer", None, 0
+
+    def render(self):
+        """Refill the pooled items for the current scroll position, cost depends only on the window size"""
+        self.build_layout()
+        self.first_row = max(0, min(self.first_row, self.total_rows - self.visible_rows))
+
+        wanted = self.visible_rows + self.BUFFER_ROWS
+        while len(self.pool) < wanted:
+            self.pool.append(self.tree.insert('', 'end', text=""))
+        while len(self.pool) > wanted:
+            self.tree.delete(self.pool.pop())
+
+        for offset, item in enumerate(self.pool):
+            row = self.first_row + offset
+            kind, group, index = self.row_at(row) if row < self.total_rows else ("spacer", None, 0)
+            if kind == "header":
+                marker = "▸" if group in self.collapsed else "📁"
+                self.tree.item(item, text=f"{marker} {group} ({index} matches)",
+                               values=(group,), tags=("classification",))
+            elif kind == "match":
+                display_text, path = self.source.result_row(group, index)
+                self.tree.item(item, text=f"  📄 {display_text}", values=(path,), tags=())
+            else:
+                self.tree.item(item, text="", values=("spacer",), tags=())
+
+        # Keep the selection on the same row while the pool is reused
+        if self.selected_row is not None and 0 <= self.selected_row - self.first_row < len(self.pool):
+            item = self.pool[self.selected_row - self.first_row]
+            if self.tree.selection() != (item,):
+                self.tree.selection_set(item)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+        if self.total_rows:
+            self.scrollbar.set(self.first_row / self.total_rows,
+                               min(1.0, (self.first_row + self.visible_rows) / self.total_rows))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_rows(self, rows):
+        self.first_row += rows
+        self.render()
+        return "break"
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.first_row = int(float(amount) * self.total_rows)
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.first_row += int(amount) * step
+        self.render()
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS reports small deltas
+        if platform.system() == "Darwin":
+            rows = -event.delta
+        else:
+            rows = -3 * int(event.delta / 120)
+        return self.scroll_rows(rows)
+
+    def on_configure(self, event):
+        # One row is taken by the column heading
+        visible_rows = max(1, event.height // self.row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self.pool:
+            self.selected_row = self.first_row + self.pool.index(selection[0])
+
+    def move_selection(self, step):
+        """Keyboard navigation over the whole list, scrolling when the selection leaves the window"""
+        current = self.selected_row if self.selected_row is not None else self.first_row
+        if step == "home":
+            current = 0
+        elif step == "end":
+            current = self.total_rows - 1
+        elif step == "page":
+            current += self.visible_rows
+        elif step == "-page":
+            current -= self.visible_rows
+        else:
+            current += step
+        self.selected_row = max(0, min(current, self.total_rows - 1))
+
+        if self.selected_row < self.first_row:
+            self.first_row = self.selected_row
+        elif self.selected_row >= self.first_row + self.visible_rows:
+            self.first_row = self.selected_row - self.visible_rows + 1
+        self.render()
+        return "break"
+
+
+class FolderScraperApp:
+    # Scan Order choices and their SearchEngine order
+    SCAN_ORDERS = {"Depth first": "depth", "Breadth first": "breadth", "Priority": "priority"}
+
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Folder Scraper")
+        self.root.geometry("1000x700")
+
+        # User-defined classification categories
+        self.classification_categories = []
+
+        # Variables
+        self.selected_folder = tk.StringVar()
+        self.search_keyword = tk.StringVar()
+        self.max_depth = tk.IntVar(value=10)  # Limit search depth
+        self.max_results = tk.IntVar(value=1000)  # Limit results
+        self.scan_workers = tk.IntVar(value=1)  # Parallel scanner threads
+        self.use_index = tk.BooleanVar(value=False)  # Answer searches from the name index
+        self.watch_index = tk.BooleanVar(value=False)  # Keep the index of the default folder current
+        self.follow_symlinks = tk.BooleanVar(value=False)  # Descend into symlinks and junctions
+        self.batch_query = tk.BooleanVar(value=False)  # Several ;-separated patterns in one pass
+        self.use_cache = tk.BooleanVar(value=True)  # Answer repeated and narrowed searches from memory
+        self.search_processes = tk.IntVar(value=1)  # Worker processes for multi-root searches
+        self.split_top_level = tk.BooleanVar(value=False)  # Shard roots by their top-level folders
+        self.capture_profile = tk.BooleanVar(value=False)  # Run the search under cProfile
+        self.content_search = tk.BooleanVar(value=False)  # Look for the keyword inside files
+        self.file_extensions = tk.StringVar()  # Comma-separated extensions to report or read, empty allows all
+        self.max_file_size = tk.IntVar(value=20)  # Content search skips larger files (MB)
+        self.filter_min_size = tk.StringVar()  # Only report files of at least this size (MB)
+        self.filter_max_size = tk.StringVar()  # Only report files of at most this size (MB)
+        self.filter_days = tk.StringVar()  # Only report entries modified in this many days
+        self.sort_by = tk.StringVar(value="None")  # Keep the top Max Results matches by size, date or name
+        self.exclude_patterns = tk.StringVar()  # ;-separated gitignore-style patterns to skip, saved in settings
+        # Order in which folders are scanned
+        self.scan_order = tk.StringVar(value=self.scan_order_label(ScanQueue.DEFAULT_ORDER))
+        self.search_archives = tk.BooleanVar(value=False)  # Search inside zip and tar archives
+        self.dir_timeout = tk.IntVar(value=0)  # Skip folders whose listing takes longer (seconds), 0 waits forever
+
+        # Thread control
+        self.search_thread = None
+        self.stop_search = False
+        self.search_engine = None
+        self.current_results = ResultStore()
+        self.search_cache = SearchCache()
+        # Archive listings, kept across searches
+        self.archive_reader = ArchiveReader()
+        self.profiler = None
+        self.exporter = None
+        self.result_channel = None
+        self.duplicate_finder = None
+        # True while the results view shows duplicate groups instead of search results
+        self.showing_duplicates = False
+
+        # Persistent name index, opened on first use
+        self.file_index = None
+        self.index_thread = None
+        self.index_watcher = None
+        self.settings_options = {}
+        self.extra_roots = []
+
+        # Settings file path
+        self.settings_file = SETTINGS_FILE
+
+        # Load saved default folder or set initial default
+        self.load_default_folder()
+
+        self.setup_ui()
+
+        # Resume watching the default folder if it was enabled last time
+        if self.settings_options.get("watch_index") == "1":
+            self.watch_index.set(True)
+            self.restart_index_watcher()
+
+    @classmethod
+    def scan_order_label(cls, order):
+        """Label of a ScanQueue order in the scan order box, the default order's for unknown values"""
+        labels = {value: label for label, value in cls.SCAN_ORDERS.items()}
+        return labels.get(order, labels[ScanQueue.DEFAULT_ORDER])
+
+    def load_default_folder(self):
+        """Load the saved default folder from settings file"""
+        saved_folder, categories, self.settings_options = read_settings(self.settings_file)
+        self.extra_roots = [root for root in self.settings_options.get("extra_roots", "").split(os.pathsep) if root]
+        self.exclude_patterns.set(self.settings_options.get("excludes", ""))
+        self.scan_order.set(self.scan_order_label(self.settings_options.get("scan_order", ScanQueue.DEFAULT_ORDER)))
+        timeout = self.settings_options.get("dir_timeout", "0")
+        self.dir_timeout.set(int(timeout) if timeout.isdigit() else 0)
+        if saved_folder is not None or categories:
+            if saved_folder and os.path.exists(saved_folder):
+                self.selected_folder.set(saved_folder)
+            self.classification_categories = categories
+            return
+
+        # If no saved folder or file doesn't exist, use default
+        default_folder = r"C:\Users\kayo\OneDrive\Documents"  # Change this line
+        if os.path.exists(default_folder):
+            self.selected_folder.set(default_folder)
+        
+        # No default categories - start with empty list
+
+    def save_settings(self):
+        """Save the selected folder and classification categories for future use"""
+        try:
+            with open(self.settings_file, 'w', encoding='utf-8') as f:
+                f.write(self.selected_folder.get() + '\n')
+                f.write(','.join(self.classification_categories) + '\n')
+                for key, value in sorted(self.settings_options.items()):
+                    f.write(f"{key}={value}\n")
+        except:
+            pass  # Silently ignore save errors
+
+    def setup_ui(self):
+        # Set theme
+        style = ttk.Style()
+        style.theme_use('vista')  # or 'vista', 'xpnative', 'winnative'
+
+        # Main frame
+        main_frame = ttk.Frame(self.root, padding="20")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        # Configure grid weights
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        main_frame.rowconfigure(8, weight=1)
+
+        # Folder selection
+        ttk.Label(main_frame, text="Select Folder:", font=("Arial", 14)).grid(
+            row=0, column=0, sticky=tk.W, pady=(0, 10))
+
+        folder_frame = ttk.Frame(main_frame)
+        folder_frame.grid(row=0, column=1, sticky=(tk.W, tk.E), pady=(0, 10))
+        folder_frame.columnconfigure(0, weight=1)
+
+        self.folder_entry = ttk.Entry(
+            folder_frame, textvariable=self.selected_folder, font=("Arial", 12), state="readonly")
+        self.folder_entry.grid(
+            row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+
+        ttk.Button(folder_frame, text="Browse",
+                   command=self.browse_folder).grid(row=0, column=1)
+        ttk.Button(folder_frame, text="Add Root",
+                   command=self.add_extra_root).grid(row=0, column=2, padx=(5, 0))
+
+        # Additional roots searched together with the selected folder
+        self.extra_roots_var = tk.StringVar()
+        ttk.Label(folder_frame, textvariable=self.extra_roots_var).grid(
+            row=1, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Button(folder_frame, text="Clear Roots",
+                   command=self.clear_extra_roots).grid(row=1, column=1, columnspan=2, sticky=tk.E, pady=(5, 0))
+        self.update_extra_roots_display()
+
+        # Classification categories management
+        categories_frame = ttk.LabelFrame(main_frame, text="Classification Categories (Optional)", padding="10")
+        categories_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        categories_frame.columnconfigure(1, weight=1)
+
+        # Current categories display
+        ttk.Label(categories_frame, text="Current Categories:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+        
+        self.categories_var = tk.StringVar()
+        self.update_categories_display()
+        categories_display = ttk.Entry(categories_frame, textvariable=self.categories_var, 
+                                     font=("Arial", 10), state="readonly")
+        categories_display.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10))
+
+        # Add category section
+        add_frame = ttk.Frame(categories_frame)
+        add_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        add_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(add_frame, text="Add Category:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+        
+        self.new_category_var = tk.StringVar()
+        self.category_entry = ttk.Entry(add_frame, textvariable=self.new_category_var, font=("Arial", 10))
+        self.category_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10))
+        self.category_entry.bind('<Return>', lambda e: self.add_category())
+
+        ttk.Button(add_frame, text="Add", command=self.add_category).grid(row=0, column=2, padx=(5, 10))
+        ttk.Button(add_frame, text="Clear All", command=self.clear_categories).grid(row=0, column=3, padx=(5, 0))
+
+        # Remove category section
+        remove_frame = ttk.Frame(categories_frame)
+        remove_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+        remove_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(remove_frame, text="Remove Category:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+        
+        self.remove_category_var = tk.StringVar()
+        self.remove_combobox = ttk.Combobox(remove_frame, textvariable=self.remove_category_var, 
+                                          font=("Arial", 10), state="readonly")
+        self.remove_combobox.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10))
+        self.update_remove_combobox()
+
+        ttk.Button(remove_frame, text="Remove", command=self.remove_category).grid(row=0, column=2)
+
+        # Search keyword
+        ttk.Label(main_frame, text="Search Keyword:", font=("Arial", 14)).grid(
+            row=2, column=0, sticky=tk.W, pady=(0, 10))
+
+        search_frame = ttk.Frame(main_frame)
+        search_frame.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=(0, 10))
+        search_frame.columnconfigure(0, weight=1)
+
+        self.search_entry = ttk.Entry(
+            search_frame, textvariable=self.search_keyword, font=("Arial", 12))
+        self.search_entry.grid(
+            row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+        self.search_entry.bind('<Return>', lambda e: self.search_folders())
+
+        self.search_button = ttk.Button(search_frame, text="Search",
+                                       command=self.search_folders)
+        self.search_button.grid(row=0, column=1, padx=(10, 0))
+
+        self.stop_button = ttk.Button(search_frame, text="Stop",
+                                     command=self.stop_search_process, state="disabled")
+        self.stop_button.grid(row=0, column=2, padx=(5, 0))
+
+        self.export_button = ttk.Button(search_frame, text="Export...", command=self.export_search)
+        self.export_button.grid(row=0, column=3, padx=(5, 0))
+
+        self.duplicates_button = ttk.Button(search_frame, text="Find Duplicates", command=self.find_duplicates)
+        self.duplicates_button.grid(row=0, column=4, padx=(5, 0))
+
+        ttk.Checkbutton(search_frame, text="Batch (patterns separated by ;)",
+                        variable=self.batch_query).grid(row=0, column=5, padx=(10, 0))
+
+        # Settings frame
+        settings_frame = ttk.LabelFrame(main_frame, text="Search Settings", padding="10")
+        settings_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        settings_frame.columnconfigure(2, weight=1)
+
+        ttk.Label(settings_frame, text="Max Depth:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+        depth_spinbox = ttk.Spinbox(settings_frame, from_=1, to=20, width=10, textvariable=self.max_depth)
+        depth_spinbox.grid(row=0, column=1, padx=(0, 20))
+
+        ttk.Label(settings_frame, text="Max Results:").grid(row=0, column=2, sticky=tk.W, padx=(0, 10))
+        results_spinbox = ttk.Spinbox(settings_frame, from_=100, to=10000000, width=10, textvariable=self.max_results, increment=1000)
+        results_spinbox.grid(row=0, column=3, padx=(0, 20))
+
+        ttk.Label(settings_frame, text="Scan Threads:").grid(row=0, column=4, sticky=tk.W, padx=(0, 10))
+        workers_spinbox = ttk.Spinbox(settings_frame, from_=1, to=64, width=10, textvariable=self.scan_workers)
+        workers_spinbox.grid(row=0, column=5)
+
+        index_frame = ttk.Frame(settings_frame)
+        index_frame.grid(row=1, column=0, columnspan=6, sticky=tk.W, pady=(10, 0))
+        ttk.Checkbutton(index_frame, text="Search using the saved index", variable=self.use_index,
+                        command=self.show_index_status).grid(row=0, column=0, padx=(0, 20))
+        self.index_button = ttk.Button(index_frame, text="Refresh Index", command=self.refresh_index)
+        self.index_button.grid(row=0, column=1, padx=(0, 20))
+        ttk.Checkbutton(index_frame, text="Keep the index of this folder up to date",
+                        variable=self.watch_index, command=self.toggle_index_watcher).grid(row=0, column=2)
+
+        options_frame = ttk.Frame(settings_frame)
+        options_frame.grid(row=2, column=0, columnspan=6, sticky=tk.W, pady=(10, 0))
+        ttk.Checkbutton(options_frame, text="Follow symlinks / junctions",
+                        variable=self.follow_symlinks).grid(row=0, column=0, padx=(0, 20))
+        ttk.Checkbutton(options_frame, text="Reuse recent results",
+                        variable=self.use_cache).grid(row=0, column=1, padx=(0, 20))
+        ttk.Label(options_frame, text="Processes:").grid(row=0, column=2, padx=(0, 10))
+        ttk.Spinbox(options_frame, from_=1, to=64, width=5, textvariable=self.search_processes).grid(
+            row=0, column=3, padx=(0, 20))
+        ttk.Checkbutton(options_frame, text="One process per top-level folder",
+                        variable=self.split_top_level).grid(row=0, column=4, padx=(0, 20))
+        ttk.Checkbutton(options_frame, text="Capture cProfile",
+                        variable=self.capture_profile).grid(row=0, column=5)
+
+        content_frame = ttk.Frame(settings_frame)
+        content_frame.grid(row=3, column=0, columnspan=6, sticky=tk.W, pady=(10, 0))
+        ttk.Checkbutton(content_frame, text="Search file contents",
+                        variable=self.content_search).grid(row=0, column=0, padx=(0, 20))
+        ttk.Label(content_frame, text="Max File Size (MB):").grid(row=0, column=1, padx=(0, 10))
+        ttk.Spinbox(content_frame, from_=1, to=4096, width=6, textvariable=self.max_file_size).grid(row=0, column=2)
+
+        filter_frame = ttk.Frame(settings_frame)
+        filter_frame.grid(row=4, column=0, columnspan=6, sticky=tk.W, pady=(10, 0))
+        ttk.Label(filter_frame, text="Extensions:").grid(row=0, column=0, padx=(0, 10))
+        ttk.Entry(filter_frame, textvariable=self.file_extensions, width=16).grid(row=0, column=1, padx=(0, 20))
+        ttk.Label(filter_frame, text="Size (MB):").grid(row=0, column=2, padx=(0, 10))
+        ttk.Entry(filter_frame, textvariable=self.filter_min_size, width=6).grid(row=0, column=3)
+        ttk.Label(filter_frame, text="to").grid(row=0, column=4, padx=5)
+        ttk.Entry(filter_frame, textvariable=self.filter_max_size, width=6).grid(row=0, column=5, padx=(0, 20))
+        ttk.Label(filter_frame, text="Modified in last (days):").grid(row=0, column=6, padx=(0, 10))
+        ttk.Entry(filter_frame, textvariable=self.filter_days, width=6).grid(row=0, column=7, padx=(0, 20))
+        ttk.Label(filter_frame, text="Sort by:").grid(row=0, column=8, padx=(0, 10))
+        ttk.Combobox(filter_frame, textvariable=self.sort_by, values=("None", "Size", "Date", "Name"),
+                     state="readonly", width=6).grid(row=0, column=9)
+
+        exclude_frame = ttk.Frame(settings_frame)
+        exclude_frame.grid(row=5, column=0, columnspan=6, sticky=tk.W, pady=(10, 0))
+        ttk.Label(exclude_frame, text="Exclude (e.g. node_modules/; .git/; *.bak):").grid(row=0, column=0, padx=(0, 10))
+        ttk.Entry(exclude_frame, textvariable=self.exclude_patterns, width=40).grid(row=0, column=1, padx=(0, 20))
+        ttk.Label(exclude_frame, text="Scan Order:").grid(row=0, column=2, padx=(0, 10))
+        ttk.Combobox(exclude_frame, textvariable=self.scan_order, values=tuple(self.SCAN_ORDERS),
+                     state="readonly", width=12).grid(row=0, column=3, padx=(0, 20))
+        ttk.Checkbutton(exclude_frame, text="Search inside zip / tar archives",
+                        variable=self.search_archives).grid(row=0, column=4, padx=(0, 20))
+        ttk.Label(exclude_frame, text="Folder Timeout (s):").grid(row=0, column=5, padx=(0, 10))
+        ttk.Spinbox(exclude_frame, from_=0, to=3600, width=5, textvariable=self.dir_timeout).grid(row=0, column=6)
+
+        # Progress bar
+        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
+        self.progress.grid(row=4, column=0, columnspan=2,
+                           sticky=(tk.W, tk.E), pady=(0, 10))
+
+        # Status label
+        self.status_label = ttk.Label(
+            main_frame, text="Ready", font=("Arial", 11))
+        self.status_label.grid(
+            row=5, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+
+        # Real-time results counter
+        self.results_counter = ttk.Label(
+            main_frame, text="Results found: 0", font=("Arial", 10), foreground="blue")
+        self.results_counter.grid(
+            row=6, column=0, sticky=(tk.W, tk.N), pady=(0, 10))
+
+        # Live search statistics
+        self.stats_label = ttk.Label(main_frame, text="", font=("Arial", 9), foreground="gray")
+        self.stats_label.grid(row=6, column=1, sticky=tk.W, pady=(0, 10))
+
+        # Results area
+        results_frame = ttk.Frame(main_frame)
+        results_frame.grid(row=7, column=0, columnspan=2,
+                           sticky=(tk.W, tk.E, tk.N, tk.S))
+        results_frame.columnconfigure(0, weight=1)
+        results_frame.rowconfigure(0, weight=1)
+
+        # Configure treeview font, rows are tall enough for the classification titles
+        row_height = tkfont.Font(font=("Arial", 16, "bold")).metrics("linespace") + 4
+        style = ttk.Style()
+        style.configure("Treeview", font=("Arial", 11), rowheight=row_height)
+        style.configure("Treeview.Heading", font=("Arial", 12, "bold"))
+
+        # Virtualized treeview for results, it only holds the rows on screen
+        self.results_view = VirtualResultList(results_frame, self, row_height)
+        self.tree = self.results_view.tree
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        # Configure big titles for classification groups
+        self.tree.tag_configure("classification", font=(
+            "Arial", 16, "bold"), foreground="green")
+
+        # Scrollbars
+        self.results_view.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        h_scrollbar = ttk.Scrollbar(
+            results_frame, orient="horizontal", command=self.tree.xview)
+        h_scrollbar.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+
+        # Configure treeview
+        self.tree.heading('#0', text='Search Results', anchor=tk.W)
+        self.tree.bind('<Double-1>', self.on_item_double_click)
+        self.reset_results_view()
+
+    def update_categories_display(self):
+        """Update the display of current categories"""
+        categories_text = ", ".join(self.classification_categories) if self.classification_categories else "No categories defined"
+        self.categories_var.set(categories_text)
+
+    def update_remove_combobox(self):
+        """Update the remove category combobox"""
+        self.remove_combobox['values'] = self.classification_categories
+        if self.classification_categories:
+            self.remove_combobox.set('')
+
+    def add_category(self):
+        """Add a new classification category"""
+        category = self.new_category_var.get().strip()
+        if not category:
+            messagebox.showwarning("Warning", "Please enter a category name.")
+            return
+        
+        if category in self.classification_categories:
+            messagebox.showwarning("Warning", f"Category '{category}' already exists.")
+            return
+        
+        self.classification_categories.append(category)
+        self.new_category_var.set("")
+        self.update_categories_display()
+        self.update_remove_combobox()
+        self.save_settings()
+
+    def remove_category(self):
+        """Remove a classification category"""
+        category = self.remove_category_var.get()
+        if not category:
+            messagebox.showwarning("Warning", "Please select a category to remove.")
+            return
+        
+        if category in self.classification_categories:
+            self.classification_categories.remove(category)
+            self.update_categories_display()
+            self.update_remove_combobox()
+            self.save_settings()
+
+    def clear_categories(self):
+        """Clear all classification categories"""
+        if messagebox.askyesno("Confirm", "Are you sure you want to clear all categories?"):
+            self.classification_categories.clear()
+            self.update_categories_display()
+            self.update_remove_combobox()
+            self.save_settings()
+
+    def update_extra_roots_display(self):
+        """Update the list of additional roots under the folder entry"""
+        if self.extra_roots:
+            self.extra_roots_var.set("Also searching: " + ", ".join(self.extra_roots))
+        else:
+            self.extra_roots_var.set("No additional roots")
+
+    def add_extra_root(self):
+        """Add another folder to search together with the selected one"""
+        folder = filedialog.askdirectory()
+        if folder and folder not in self.extra_roots and folder != self.selected_folder.get():
+            self.extra_roots.append(folder)
+            self.settings_options["extra_roots"] = os.pathsep.join(self.extra_roots)
+            self.update_extra_roots_display()
+            self.save_settings()
+
+    def clear_extra_roots(self):
+        self.extra_roots.clear()
+        self.settings_options.pop("extra_roots", None)
+        self.update_extra_roots_display()
+        self.save_settings()
+
+    def browse_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.selected_folder.set(folder)
+            # Save settings when folder changes
+            self.save_settings()
+            if self.watch_index.get():
+                self.restart_index_watcher()
+
+    def export_search(self):
+        """Run the search and stream its matches into a CSV or JSON Lines file instead of the results view"""
+        path = filedialog.asksaveasfilename(title="Export Matches", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if path:
+            self.search_folders(export_path=path)
+
+    def search_folders(self, export_path=None):
+        if not self.selected_folder.get():
+            messagebox.showwarning("Warning", "Please select a folder first.")
+            return
+
+        if not self.search_keyword.get().strip():
+            messagebox.showwarning("Warning", "Please enter a search keyword.")
+            return
+
+        # Removed the check for classification categories - search can work without them
+
+        # Check if search is already running
+        if self.search_thread and self.search_thread.is_alive():
+            messagebox.showinfo("Info", "Search is already running. Please wait or stop the current search.")
+            return
+
+        # Batch queries take several patterns separated by ";"
+        patterns = None
+        if self.batch_query.get():
+            patterns = [pattern for pattern in self.search_keyword.get().split(';') if pattern.strip()]
+        extensions = self.file_extensions.get().split(',')
+        content = None
+        if self.content_search.get():
+            content = ContentSearcher(self.search_keyword.get(), extensions, self.max_file_size.get() * 1024 * 1024)
+        sort = self.sort_by.get().lower()
+        order = self.SCAN_ORDERS.get(self.scan_order.get(), ScanQueue.DEFAULT_ORDER)
+        excludes = self.exclude_patterns.get().strip()
+        dir_timeout = max(0, self.dir_timeout.get())
+        if (self.settings_options.get("excludes", "") != excludes
+                or self.settings_options.get("scan_order", ScanQueue.DEFAULT_ORDER) != order
+                or self.settings_options.get("dir_timeout", "0") != str(dir_timeout)):
+            self.settings_options["excludes"] = excludes
+            self.settings_options["scan_order"] = order
+            self.settings_options["dir_timeout"] = str(dir_timeout)
+            self.save_settings()
+
+        try:
+            filters = self.metadata_filter(extensions=None if content else extensions)
+            search_engine = SearchEngine(
+                self.selected_folder.get(),
+                self.search_keyword.get(),
+                max_depth=self.max_depth.get(),
+                max_results=self.max_results.get(),
+                categories=self.classification_categories,
+                workers=self.scan_workers.get(),
+                index=self.get_file_index() if self.use_index.get() else None,
+                follow_symlinks=self.follow_symlinks.get(),
+                patterns=patterns,
+                # Exports stream straight to the file with the stat of the scan, never through the cache
+                cache=self.search_cache if self.use_cache.get() and export_path is None else None,
+                extra_roots=[root for root in self.extra_roots if os.path.isdir(root)],
+                processes=self.search_processes.get(),
+                split_top_level=self.split_top_level.get(),
+                collect_stat=export_path is not None,
+                content=content,
+                filters=filters,
+                sort=sort if sort in SearchEngine.SORT_KEYS else None,
+                excludes=ExcludeRules.from_text(excludes),
+                order=order,
+                archives=self.archive_reader if self.search_archives.get() else None,
+                dir_timeout=dir_timeout)
+        except re.error as e:
+            messagebox.showwarning("Warning", f"Invalid regular expression: {e}")
+            return
+        except ValueError as e:
+            messagebox.showwarning("Warning", f"Invalid search: {e}.")
+            return
+
+        exporter = None
+        if export_path:
+            try:
+                exporter = ResultExporter(export_path, follow_symlinks=self.follow_symlinks.get())
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not create the export file: {e}")
+                return
+
+        # Reset search state
+        self.stop_search = False
+        self.current_results = ResultStore()
+        self.showing_duplicates = False
+        self.search_engine = search_engine
+        self.exporter = exporter
+        self.result_channel = ResultChannel(cancelled=lambda: search_engine.cancelled)
+        self.profiler = cProfile.Profile() if self.capture_profile.get() else None
+
+        # Clear previous results
+        self.reset_results_view()
+
+        # Update UI state
+        self.search_button.config(state="disabled")
+        self.export_button.config(state="disabled")
+        self.duplicates_button.config(state="disabled")
+        self.stop_button.config(state="normal")
+        self.progress.start()
+        self.status_label.config(text=f"Exporting to {export_path}..." if exporter else "Searching...")
+        self.results_counter.config(text="Results found: 0")
+        self.stats_label.config(text="")
+
+        # Start search in a separate thread
+        self.search_thread = threading.Thread(target=self.perform_search_threaded, daemon=True)
+        self.search_thread.start()
+
+        # Start periodic UI updates
+        self.update_ui_periodically()
+
+    def stop_search_process(self):
+        """Stop the current search"""
+        self.stop_search = True
+        if self.search_engine:
+            self.search_engine.cancel()
+        if self.duplicate_finder:
+            self.duplicate_finder.cancel()
+        self.search_button.config(state="normal")
+        self.export_button.config(state="normal")
+        self.duplicates_button.config(state="normal")
+        self.stop_button.config(state="disabled")
+        self.progress.stop()
+        if self.exporter:
+            self.status_label.config(text=f"Export stopped by user. The matches found so far are in {self.exporter.path}.")
+        else:
+            self.status_label.config(text="Search stopped by user.")
+
+    def find_duplicates(self):
+        """Look for identical files among the current results, or below the selected folder and added roots"""
+        if self.search_thread and self.search_thread.is_alive():
+            messagebox.showinfo("Info", "Search is already running. Please wait or stop the current search.")
+            return
+        if not self.selected_folder.get():
+            messagebox.showwarning("Warning", "Please select a folder first.")
+            return
+
+        paths = None
+        if len(self.current_results) and not self.showing_duplicates:
+            answer = messagebox.askyesnocancel(
+                "Find Duplicates", "Look for duplicates among the current results?\n\n"
+                                   "Choose No to check every file below the selected folder.")
+            if answer is None:
+                return
+            if answer:
+                results = self.current_results
+                paths = [results.path(row) for row in range(len(results)) if not results.is_dir(row)]
+        if paths is None:
+            # An engine that only lists files, it also classifies the copies
+            self.search_engine = SearchEngine(
+                self.selected_folder.get(), "", max_depth=self.max_depth.get(), max_results=sys.maxsize,
+                categories=self.classification_categories, workers=self.scan_workers.get(),
+                follow_symlinks=self.follow_symlinks.get(),
+                extra_roots=[root for root in self.extra_roots if os.path.isdir(root)],
+                excludes=ExcludeRules.from_text(self.exclude_patterns.get()),
+                dir_timeout=max(0, self.dir_timeout.get()))
+
+        self.stop_search = False
+        self.exporter = None
+        self.duplicate_finder = DuplicateFinder(workers=max(4, self.scan_workers.get()))
+        self.search_button.config(state="disabled")
+        self.export_button.config(state="disabled")
+        self.duplicates_button.config(state="disabled")
+        self.stop_button.config(state="normal")
+        self.progress.start()
+        self.status_label.config(text="Looking for files with the same size...")
+        self.stats_label.config(text="")
+
+        self.search_thread = threading.Thread(target=self.perform_duplicate_search, args=(paths,), daemon=True)
+        self.search_thread.start()
+
+    def perform_duplicate_search(self, paths):
+        """Run the duplicate finder in a separate thread"""
+        finder = self.duplicate_finder
+        try:
+            files = finder.stat_paths(paths) if paths is not None else self.search_engine.files(finder)
+            groups = finder.find(files, status_callback=self.update_status_async)
+            self.root.after(0, lambda: self.show_duplicates(groups))
+        except Exception as e:
+            # e is unbound once the except block ends, before the callback runs
+            message = str(e)
+            self.root.after(0, self.handle_search_error, message)
+
+    def show_duplicates(self, groups):
+        """Show every group of identical files as one collapsible group of the results view"""
+        results = ResultStore()
+        classifier = self.search_engine.classifier
+        for number, (size, paths) in enumerate(groups, 1):
+            label = f"#{number}  {os.path.basename(paths[0])}  ({len(paths)} copies of {format_size(size)})"
+            for path in paths:
+                # Grouped by the label, the category of each copy is shown next to it
+                results.append(SearchMatch(path, classifier.classify(path), patterns=(label,)))
+        self.current_results = results
+        self.showing_duplicates = True
+        self.reset_results_view()
+
+        if not self.stop_search:
+            wasted = sum(size * (len(paths) - 1) for size, paths in groups)
+            self.status_label.config(text=f"Found {len(groups)} groups of duplicates, {format_size(wasted)} wasted. "
+                                          f"{self.duplicate_finder.describe()}")
+            self.results_counter.config(text=f"Results found: {len(results)}")
+        self.search_button.config(state="normal")
+        self.export_button.config(state="normal")
+        self.duplicates_button.config(state="normal")
+        self.stop_button.config(state="disabled")
+        self.progress.stop()
+
+    def perform_search_threaded(self):
+        """Perform search in a separate thread"""
+        try:
+            if self.profiler:
+                # Only this thread is profiled, scanner threads and worker processes are not
+                self.profiler.runcall(self.perform_search)
+            else:
+                self.perform_search()
+        except Exception as e:
+            # Schedule error display in main thread, binding the message before e is unbound
+            self.root.after(0, lambda msg=str(e): self.handle_search_error(msg))
+        finally:
+            # The main loop finishes up once it has drained everything up to here
+            self.result_channel.close()
+
+    def handle_search_error(self, error_msg):
+        """Handle search errors in the main thread"""
+        messagebox.showerror("Error", f"An error occurred during search: {error_msg}")
+        self.status_label.config(text="Search failed.")
+        self.search_button.config(state="normal")
+        self.export_button.config(state="normal")
+        self.duplicates_button.config(state="normal")
+        self.stop_button.config(state="disabled")
+        self.progress.stop()
+
+    def metadata_filter(self, extensions):
+        """Build the MetadataFilter of the Filter fields, raising ValueError for values that are not numbers"""
+        def number(variable, label):
+            text = variable.get().strip()
+            if not text:
+                return None
+            try:
+                value = float(text)
+            except ValueError:
+                raise ValueError(f"{label} must be a number") from None
+            if value < 0:
+                raise ValueError(f"{label} must not be negative")
+            return value
+
+        min_size = number(self.filter_min_size, "the minimum size")
+        max_size = number(self.filter_max_size, "the maximum size")
+        days = number(self.filter_days, "the number of days")
+        return MetadataFilter(
+            min_size=int(min_size * 1024 * 1024) if min_size is not None else None,
+            max_size=int(max_size * 1024 * 1024) if max_size is not None else None,
+            newer_than=days,
+            extensions=extensions)
+
+    def search_completed(self):
+        """Handle search completion in the main thread"""
+        # Final reconcile of the results display
+        started = time.perf_counter()
+        self.render_new_results()
+        self.search_engine.stats.record_ui(time.perf_counter() - started)
+        self.stats_label.config(text=self.search_engine.stats.describe())
+        profile_message = self.save_search_profile()
+
+        if not self.stop_search:
+            total_results = self.search_engine.total_found
+            status = f"Search completed. Found {total_results} matches."
+            if self.search_engine.sorted_from:
+                order = {"size": "largest", "date": "newest", "name": "first by name"}[self.search_engine.sort]
+                status = (f"Search completed. Showing the {total_results} {order} "
+                          f"of {self.search_engine.sorted_from} matches.")
+            if self.exporter:
+                status = f"Export completed. Wrote {self.exporter.count} matches to {self.exporter.path}."
+            if self.search_engine and self.search_engine.uses_index():
+                status += " " + self.search_engine.index.describe(self.search_engine.root)
+            if self.search_engine and self.search_engine.cache_status:
+                status += f" Cache {self.search_engine.cache_status}. {self.search_cache.describe()}"
+            if self.search_engine and self.search_engine.archives is not None:
+                status += f" {self.archive_reader.describe()}"
+            self.status_label.config(text=f"{status} {profile_message}")
+            self.results_counter.config(text=f"Results found: {total_results}")
+        
+        self.search_button.config(state="normal")
+        self.export_button.config(state="normal")
+        self.duplicates_button.config(state="normal")
+        self.stop_button.config(state="disabled")
+        self.progress.stop()
+
+    def save_search_profile(self):
+        """Write the statistics of the finished search, and the cProfile capture if enabled, next to the settings"""
+        profile = self.search_engine.profile()
+        try:
+            if self.profiler:
+                profile["cprofile"] = {"file": CPROFILE_FILE, "top": profile_summary(self.profiler)}
+                self.profiler.dump_stats(CPROFILE_FILE)
+            with open(PROFILE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(profile, f, indent=2)
+        except (OSError, TypeError, ValueError) as e:
+            return f"Could not save the search profile: {e}"
+        return f"Profile saved to {PROFILE_FILE}."
+
+    def get_file_index(self):
+        """Open the persistent name index on first use"""
+        if self.file_index is None:
+            try:
+                self.file_index = FileIndex()
+            except sqlite3.Error as e:
+                messagebox.showerror("Error", f"Could not open the index: {e}")
+                return None
+        return self.file_index
+
+    def show_index_status(self):
+        """Show the age and size of the index for the selected folder"""
+        if self.use_index.get() and self.selected_folder.get():
+            file_index = self.get_file_index()
+            if file_index:
+                self.status_label.config(text=file_index.describe(self.selected_folder.get()))
+
+    def refresh_index(self):
+        """Build or incrementally refresh the index of the selected folder in the background"""
+        if not self.selected_folder.get():
+            messagebox.showwarning("Warning", "Please select a folder first.")
+            return
+        if self.index_thread and self.index_thread.is_alive():
+            return
+        file_index = self.get_file_index()
+        if file_index is None:
+            return
+
+        folder = self.selected_folder.get()
+        self.index_button.config(state="disabled")
+        self.status_label.config(text="Refreshing index...")
+
+        def run():
+            try:
+                checked, rescanned = file_index.refresh(
+                    folder, progress_callback=lambda checked, rescanned: self.update_status_async(
+                        f"Refreshing index: {checked} folders checked, {rescanned} rescanned..."))
+                message = (f"Index refreshed ({len(rescanned)} of {checked} folders rescanned). "
+                           f"{file_index.describe(folder)}")
+            except (sqlite3.Error, OSError) as e:
+                message = f"Index refresh failed: {e}"
+            self.root.after(0, lambda: self.index_refreshed(message))
+
+        self.index_thread = threading.Thread(target=run, daemon=True)
+        self.index_thread.start()
+
+    def toggle_index_watcher(self):
+        """Start or stop the background index watcher and remember the choice"""
+        self.settings_options["watch_index"] = "1" if self.watch_index.get() else "0"
+        self.save_settings()
+        if self.watch_index.get():
+            self.restart_index_watcher()
+        elif self.index_watcher:
+            self.index_watcher.stop()
+            self.index_watcher = None
+            self.status_label.config(text="Stopped watching for changes.")
+
+    def restart_index_watcher(self):
+        """Watch the selected folder, replacing any watcher of a previous folder"""
+        if self.index_watcher:
+            self.index_watcher.stop()
+            self.index_watcher = None
+        folder = self.selected_folder.get()
+        file_index = self.get_file_index()
+        if not folder or file_index is None:
+            return
+        self.index_watcher = IndexWatcher(file_index, folder, status_callback=self.update_status_async)
+        self.index_watcher.start()
+        self.status_label.config(text=f"Updating the index of {folder}...")
+
+    def index_refreshed(self, message):
+        self.index_button.config(state="normal")
+        self.status_label.config(text=message)
+
+    def perform_search(self):
+        """Consume the search engine and pass its matches to the main loop, or stream them to the export file"""
+        channel = self.result_channel
+        exporter = self.exporter
+        try:
+            for match in self.search_engine.search():
+                # Exported matches are not kept, so the export size is not limited by memory
+                if exporter:
+                    exporter.write(match)
+                elif not channel.put(match):
+                    return
+        finally:
+            if exporter:
+                exporter.close()
+
+    def update_status_async(self, message):
+        """Update status label from background thread"""
+        self.root.after(0, lambda: self.status_label.config(text=message))
+
+    # Chunks of the result channel added to the results per UI tick
+    CHUNKS_PER_TICK = 16
+
+    def update_ui_periodically(self, channel=None):
+        """Drain a batch of results from the search thread and update the UI, until the search has ended"""
+        channel = channel or self.result_channel
+        if channel is not self.result_channel:
+            # A newer search has taken over
+            return
+        started = time.perf_counter()
+        # After Stop, take whatever is left at once so the search ends promptly
+        matches, finished = channel.drain(self.CHUNKS_PER_TICK if not self.stop_search else sys.maxsize)
+        # Only the Tk thread touches the result store, so the view never sees it change while rendering
+        for match in matches:
+            self.current_results.append(match)
+        if finished:
+            self.search_completed()
+            return
+
+        # Only the rows on screen are rendered
+        render_started = time.perf_counter()
+        self.render_new_results()
+        render_cost = time.perf_counter() - render_started
+        self.search_engine.stats.record_ui(time.perf_counter() - started)
+
+        # Update counter and statistics
+        self.results_counter.config(text=f"Results found: {self.search_engine.total_found}")
+        self.stats_label.config(text=self.search_engine.stats.describe())
+
+        # Keep rendering to roughly a tenth of the time, between 50 ms and 2 s per tick
+        interval = int(min(2000, max(50, render_cost * 10000)))
+        self.root.after(interval, self.update_ui_periodically, channel)
+
+    def display_order(self):
+        """Return the classifications, or the patterns of a batch query, in the order they are shown"""
+        if self.showing_duplicates:
+            return self.current_results.groups()
+        if self.search_engine and self.search_engine.patterns:
+            return self.search_engine.patterns
+        categories = self.search_engine.categories if self.search_engine else self.classification_categories
+        if categories:
+            return categories + ["Other"]
+        return ["All Results"]
+
+    def result_groups(self):
+        """Classifications and their match counts in display order, used by the results view"""
+        return [(classification, self.current_results.group_size(classification))
+                for classification in self.display_order()]
+
+    def result_row(self, classification, index):
+        """Return (display_text, path) of one match, used by the results view"""
+        row = self.current_results.group_row(classification, index)
+        match = self.current_results.path(row)
+        # Show relative path for cleaner display
+        base_folder = self.search_engine.root_of(match) if self.search_engine else self.selected_folder.get()
+        try:
+            display_path = os.path.relpath(match, base_folder)
+        except:
+            display_path = match
+        # Batch results are grouped by pattern, so show the category next to the path
+        if (self.search_engine and (self.showing_duplicates or self.search_engine.patterns)
+                and self.search_engine.categories):
+            display_path += f"  [{self.current_results.category(row)}]"
+        # Content hits show their first matching line
+        content = self.current_results.content(row)
+        if content:
+            display_path += f"  —  line {content[0]}: {content[2]}"
+        return display_path, match
+
+    def reset_results_view(self):
+        """Clear the results view and scroll back to the top"""
+        self.results_view.reset()
+
+    def render_new_results(self):
+        """Update header counts and the rows on screen, the cost does not grow with the number of results"""
+        self.results_view.render()
+
+    def on_item_double_click(self, event):
+        selection = self.tree.selection()
+        if selection:
+            item = selection[0]
+            values = self.tree.item(item, 'values')
+            if values and len(values) > 0:
+                path = values[0]
+                # Double-clicking a classification header collapses or expands it
+                if self.results_view.is_group(path):
+                    self.results_view.toggle_group(path)
+                    return
+                # Archive members open their archive
+                path = ArchiveReader.split_path(path)[0]
+                # Don't open classification headers or spacers
+                valid_categories = self.classification_categories + ["Other", "All Results"] if self.classification_categories else ["All Results"]
+                if (path not in valid_categories + ["spacer", "more", "search_results"] 
+                    and os.path.exists(path)):
+                    self.open_in_explorer(path)
+
+    def open_in_explorer(self, path):
+        try:
+            if platform.system() == "Windows":
+                # If it's a file, select it in explorer, otherwise open the folder
+                if os.path.isfile(path):
+                    subprocess.run(['explorer', '/select,', os.path.normpath(path)], check=True)
+                else:
+                    subprocess.run(['explorer', os.path.normpath(path)], check=True)
+            elif platform.system() == "Darwin":  # macOS
+                subprocess.run(['open', path], check=True)
+            else:  # Linux
+                subprocess.run(['xdg-open', path], check=True)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open path: {path}\nError: {str(e)}")
+
+
+def build_cli_parser():
+    saved_folder, saved_categories, saved_options = read_settings()
+    parser = argparse.ArgumentParser(
+        prog="FolderScraper.py --cli",
+        description="Search folders for file names containing a keyword and stream the matches to stdout.")
+    parser.add_argument("keyword", nargs="?", default="",
+                        help="keyword to look for in file and folder names (case-insensitive)")
+    parser.add_argument("--folder", action="append", dest="folders",
+                        help="root folder to search, may be repeated (default: the folder saved by the GUI)")
+    parser.add_argument("--max-depth", type=int, default=10, help="maximum folder depth (default: 10)")
+    parser.add_argument("--max-results", type=int, default=1000, help="stop after this many matches (default: 1000)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of parallel scanner threads (default: 1)")
+    parser.add_argument("--follow-symlinks", action="store_true",
+                        help="descend into symlinked folders and junctions (loops are detected)")
+    parser.add_argument("--category", action="append", dest="categories",
+                        help="classification category, may be repeated (default: the categories saved by the GUI)")
+    parser.add_argument("--pattern", action="append", dest="patterns",
+                        help="batch query pattern, may be repeated: plain text is a substring, "
+                             "*, ? and [ make a glob, re: starts a regular expression")
+    parser.add_argument("--patterns-file",
+                        help="file with one batch query pattern per line")
+    parser.add_argument("--content", action="store_true",
+                        help="search for the keyword inside files instead of in their names")
+    parser.add_argument("--ext", action="append", dest="extensions",
+                        help="only report files with this extension (content search: only read them), "
+                             "may be repeated or comma-separated")
+    parser.add_argument("--max-file-size", type=float, default=20,
+                        help="content search: skip files larger than this many MB (default: 20)")
+    parser.add_argument("--readers", type=int, default=4,
+                        help="content search: number of file reader threads (default: 4)")
+    parser.add_argument("--exclude", action="append", dest="excludes", metavar="PATTERN",
+                        help="gitignore-style pattern of files and folders to skip, may be repeated "
+                             "(default: the exclude patterns saved by the GUI)")
+    parser.add_argument("--exclude-from", metavar="FILE",
+                        help="file with gitignore-style exclude patterns, one per line")
+    parser.add_argument("--archives", action="store_true",
+                        help="also search the members of zip and tar archives, printed as archive.zip!/inner/path")
+    parser.add_argument("--dir-timeout", type=float, metavar="SECONDS",
+                        help="skip and report folders whose listing takes longer than this, e.g. on a hung share")
+    parser.add_argument("--order", choices=ScanQueue.ORDERS, default=ScanQueue.DEFAULT_ORDER,
+                        help="folder scan order: depth first, breadth first, or priority "
+                             "(category folders, then shallower ones, first) (default: depth)")
+    parser.add_argument("--min-size", type=float, metavar="MB",
+                        help="only report files of at least this many MB")
+    parser.add_argument("--max-size", type=float, metavar="MB",
+                        help="only report files of at most this many MB")
+    parser.add_argument("--newer-than", type=float, metavar="DAYS",
+                        help="only report entries modified in the last DAYS days")
+    parser.add_argument("--older-than", type=float, metavar="DAYS",
+                        help="only report entries last modified more than DAYS days ago")
+    parser.add_argument("--sort", choices=SearchEngine.SORT_KEYS,
+                        help="print the --max-results largest, newest or first by name of all matches, in order")
+    parser.add_argument("--duplicates", action="store_true",
+                        help="print groups of identical files, among the matches when a keyword or patterns "
+                             "are given, else among all files below the folders")
+    parser.add_argument("--show-category", action="store_true",
+                        help="prefix every match with its classification and a tab")
+    parser.add_argument("--index", action="store_true",
+                        help="answer the query from the saved name index when it covers the folder")
+    parser.add_argument("--refresh-index", action="store_true",
+                        help="incrementally refresh the name index of the folder before searching")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="search the roots in this many worker processes (default: 1)")
+    parser.add_argument("--split-top-level", action="store_true",
+                        help="give every top-level folder of the roots its own process shard")
+    parser.add_argument("--export", metavar="FILE",
+                        help="write the matches with category, size and modification time to FILE instead of stdout")
+    parser.add_argument("--export-format", choices=ResultExporter.FORMATS,
+                        help="format of the --export file (default: jsonl for .jsonl/.json/.ndjson files, else csv)")
+    parser.add_argument("--stats", action="store_true",
+                        help="print search statistics to stderr when the search ends")
+    parser.add_argument("--profile-json", metavar="FILE",
+                        help="write the search settings and statistics to FILE as JSON")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="run the search under cProfile and save the capture to FILE (see pstats)")
+    parser.set_defaults(saved_categories=saved_categories, saved_folder=saved_folder,
+                        saved_excludes=saved_options.get("excludes", ""))
+    return parser
+
+
+def run_cli(argv):
+    """Run a search without the GUI, printing each match as soon as it is found"""
+    parser = build_cli_parser()
+    args = parser.parse_args(argv)
+
+    folders = args.folders or ([args.saved_folder] if args.saved_folder else [])
+    if not folders or not all(os.path.isdir(folder) for folder in folders):
+        parser.error("please give an existing folder with --folder")
+    args.folder = folders[0]
+    patterns = list(args.patterns or [])
+    if args.patterns_file:
+        try:
+            with open(args.patterns_file, 'r', encoding='utf-8') as f:
+                patterns.extend(line.rstrip('\n') for line in f if line.strip())
+        except OSError as e:
+            parser.error(f"could not read the patterns file: {e}")
+
+    excludes = list(args.excludes) if args.excludes is not None else args.saved_excludes.split(";")
+    if args.exclude_from:
+        try:
+            with open(args.exclude_from, 'r', encoding='utf-8') as f:
+                excludes.extend(line.rstrip('\n') for line in f)
+        except OSError as e:
+            parser.error(f"could not read the exclude file: {e}")
+
+    if not args.keyword.strip() and not patterns and not args.refresh_index and not args.duplicates:
+        parser.error("please enter a search keyword")
+
+    file_index = None
+    if args.index or args.refresh_index:
+        try:
+            file_index = FileIndex()
+        except sqlite3.Error as e:
+            parser.exit(1, f"Could not open the index: {e}\n")
+    if args.refresh_index:
+        checked, rescanned = file_index.refresh(args.folder)
+        print(f"Index refreshed ({len(rescanned)} of {checked} folders rescanned). "
+              f"{file_index.describe(args.folder)}", file=sys.stderr)
+        if not args.keyword.strip() and not patterns and not args.duplicates:
+            return 0
+
+    categories = args.categories if args.categories is not None else args.saved_categories
+    extensions = [ext for value in args.extensions or [] for ext in value.split(",")]
+    content = None
+    if args.content:
+        if patterns:
+            parser.error("--content takes the keyword, not batch patterns")
+        try:
+            content = ContentSearcher(args.keyword, extensions, int(args.max_file_size * 1024 * 1024), args.readers)
+        except ValueError as e:
+            parser.error(str(e))
+    filters = MetadataFilter(
+        min_size=int(args.min_size * 1024 * 1024) if args.min_size is not None else None,
+        max_size=int(args.max_size * 1024 * 1024) if args.max_size is not None else None,
+        newer_than=args.newer_than,
+        older_than=args.older_than,
+        # Content search already reads only these extensions
+        extensions=None if content else extensions)
+    try:
+        engine = SearchEngine(args.folder, args.keyword, max_depth=args.max_depth,
+                              max_results=args.max_results, categories=categories,
+                              workers=args.workers, index=file_index if args.index else None,
+                              follow_symlinks=args.follow_symlinks, patterns=patterns,
+                              extra_roots=folders[1:], processes=args.processes,
+                              split_top_level=args.split_top_level,
+                              # The duplicate finder groups the matches by their size
+                              collect_stat=bool(args.export or args.duplicates),
+                              content=content, filters=filters, sort=args.sort,
+                              excludes=ExcludeRules(excludes), order=args.order,
+                              archives=ArchiveReader() if args.archives else None, dir_timeout=args.dir_timeout)
+    except re.error as e:
+        parser.error(f"invalid regular expression: {e}")
+
+    if args.duplicates:
+        return print_duplicates(engine, searched=bool(args.keyword.strip() or patterns), workers=args.workers)
+
+    exporter = None
+    if args.export:
+        try:
+            exporter = ResultExporter(args.export, args.export_format, follow_symlinks=args.follow_symlinks)
+        except OSError as e:
+            parser.exit(1, f"Could not create the export file: {e}\n")
+
+    def print_matches():
+        for match in engine.search():
+            if exporter:
+                exporter.write(match)
+                continue
+            line = f"{match.category}\t{match.path}" if args.show_category else match.path
+            if match.content:
+                # Content hits print like grep -n
+                line += f":{match.content[0]}: {match.content[2]}"
+            if match.patterns:
+                # Batch queries print one line per matched pattern
+                for pattern in match.patterns:
+                    print(f"{pattern}\t{line}", flush=True)
+            else:
+                print(line, flush=True)
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    status = 0
+    try:
+        if profiler:
+            profiler.runcall(print_matches)
+        else:
+            print_matches()
+    except KeyboardInterrupt:
+        engine.cancel()
+        status = 130
+    except BrokenPipeError:
+        # Output was closed early (e.g. piped into head)
+        engine.cancel()
+        sys.stdout = None
+    finally:
+        if exporter:
+            exporter.close()
+            print(f"Wrote {exporter.count} matches to {exporter.path}", file=sys.stderr)
+
+    if args.stats:
+        print(engine.stats.describe(), file=sys.stderr)
+    try:
+        profile = engine.profile()
+        if profiler:
+            profiler.dump_stats(args.cprofile)
+            profile["cprofile"] = {"file": args.cprofile, "top": profile_summary(profiler)}
+        if args.profile_json:
+            with open(args.profile_json, 'w', encoding='utf-8') as f:
+                json.dump(profile, f, indent=2)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Could not save the search profile: {e}", file=sys.stderr)
+    return status
+
+
+def print_duplicates(engine, searched, workers):
+    """Print the groups of identical files among the matches of engine, or below its roots, for --duplicates"""
+    finder = DuplicateFinder(workers=max(4, workers))
+    if searched:
+        files = finder.stat_matches(match for match in engine.search() if not match.is_dir)
+    else:
+        files = engine.files(finder)
+    try:
+        groups = finder.find(files, status_callback=lambda message: print(message, file=sys.stderr))
+        for size, paths in groups:
+            print(f"# {len(paths)} copies of {size} bytes")
+            for path in paths:
+                print(path)
+            print()
+        sys.stdout.flush()
+    except KeyboardInterrupt:
+        engine.cancel()
+        finder.cancel()
+        return 130
+    except BrokenPipeError:
+        sys.stdout = None
+        return 0
+    wasted = sum(size * (len(paths) - 1) for size, paths in groups)
+    print(f"{len(groups)} groups of duplicates, {format_size(wasted)} wasted. {finder.describe()}", file=sys.stderr)
+    return 0
+
+
+def main():
+    # Needed for the search worker processes in frozen Windows builds
+    multiprocessing.freeze_support()
+
+    if "--cli" in sys.argv[1:]:
+        argv = [arg for arg in sys.argv[1:] if arg != "--cli"]
+        sys.exit(run_cli(argv))
+
+    root = tk.Tk()
+    app = FolderScraperApp(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
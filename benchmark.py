@@ -0,0 +1,427 @@
+"""Reproducible benchmarks for Folder Scraper.
+
+Generates a deterministic synthetic folder tree, then times the search
+traversal, the category classification and the rendering of the results
+view, and prints a JSON report that can be compared between runs:
+
+    python benchmark.py --depth 4 --fanout 6 --files 30 --workers 1 4 --output bench.json
+
+Rendering uses a real Tk window when a display is available (e.g. under
+Xvfb) and a headless stand-in for the Treeview otherwise, which measures
+only the Python side of the view.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import string
+import argparse
+import platform
+import tempfile
+import types
+
+import FolderScraper
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it can't be measured"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    if platform.system() == "Darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def random_name(rng, mean_length, spread, keyword, hit_rate):
+    """Return a random file or folder name, containing keyword with probability hit_rate"""
+    length = max(1, int(rng.gauss(mean_length, spread)))
+    name = "".join(rng.choice(string.ascii_lowercase + string.digits + "_-") for _ in range(length))
+    if keyword and rng.random() < hit_rate:
+        position = rng.randint(0, len(name))
+        name = name[:position] + keyword + name[position:]
+    return name
+
+
+def generate_tree(root, depth=4, fanout=5, files=20, name_length=12, name_spread=4, keyword="report",
+                  hit_rate=0.02, categories=(), category_rate=0.1, symlink_loops=0, unreadable=0, seed=0):
+    """Create a deterministic synthetic tree under root and return a summary of what was made"""
+    rng = random.Random(seed)
+    made = {"dirs": 0, "files": 0, "symlink_loops": 0, "unreadable_dirs": 0}
+    all_dirs = []
+
+    def fill(path, level):
+        all_dirs.append(path)
+        used = set()
+        for _ in range(files):
+            name = random_name(rng, name_length, name_spread, keyword, hit_rate)
+            if name in used:
+                continue
+            used.add(name)
+            with open(os.path.join(path, name + ".txt"), "w") as f:
+                f.write(name)
+            made["files"] += 1
+
+        if level >= depth:
+            return
+        for _ in range(fanout):
+            name = random_name(rng, name_length, name_spread, keyword, hit_rate / 4)
+            if categories and rng.random() < category_rate:
+                name = rng.choice(categories) + "_" + name
+            if name in used:
+                continue
+            used.add(name)
+            child = os.path.join(path, name)
+            os.mkdir(child)
+            made["dirs"] += 1
+            fill(child, level + 1)
+
+    fill(root, 0)
+
+    # Symlinks pointing back up the tree, which a naive walk would follow forever
+    for index in range(symlink_loops):
+        target = rng.choice(all_dirs)
+        link = os.path.join(rng.choice(all_dirs), f"loop_{index}")
+        try:
+            os.symlink(target, link, target_is_directory=True)
+            made["symlink_loops"] += 1
+        except (OSError, NotImplementedError):
+            break
+
+    # Folders the search is not allowed to read
+    for index in range(unreadable):
+        path = os.path.join(rng.choice(all_dirs), f"locked_{index}")
+        os.mkdir(path)
+        os.chmod(path, 0)
+        made["unreadable_dirs"] += 1
+
+    return made
+
+
+def unlock_tree(root):
+    """Make unreadable folders removable again"""
+    for path, dirnames, _ in os.walk(root):
+        for name in dirnames:
+            if name.startswith("locked_"):
+                try:
+                    os.chmod(os.path.join(path, name), 0o755)
+                except OSError:
+                    pass
+
+
+def bench_traversal(root, keyword, categories, max_depth, workers, follow_symlinks, repeat,
+                    order=FolderScraper.ScanQueue.DEFAULT_ORDER, excludes=None, backend=None, dir_timeout=None):
+    """Time full searches and return the best run"""
+    best = None
+    for _ in range(repeat):
+        engine = FolderScraper.SearchEngine(root, keyword, max_depth=max_depth, max_results=10 ** 9,
+                                            categories=categories, workers=workers,
+                                            follow_symlinks=follow_symlinks, order=order,
+                                            excludes=FolderScraper.ExcludeRules(excludes or []),
+                                            backend=backend, dir_timeout=dir_timeout)
+        started = time.perf_counter()
+        first_result = None
+        matches = []
+        for match in engine.search():
+            if first_result is None:
+                first_result = time.perf_counter() - started
+            matches.append(match)
+        elapsed = time.perf_counter() - started
+
+        run = {
+            "workers": workers,
+            "follow_symlinks": follow_symlinks,
+            "order": order,
+            "excludes": list(excludes or []),
+            "dir_timeout": dir_timeout,
+            "seconds": round(elapsed, 4),
+            "entries": engine.processed_count,
+            "matches": len(matches),
+            "files_per_sec": round(engine.processed_count / elapsed) if elapsed else None,
+            "time_to_first_result": round(first_result, 4) if first_result is not None else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "stats": engine.stats.snapshot(),
+        }
+        if best is None or run["seconds"] < best["seconds"]:
+            best = run
+    return best, matches
+
+
+def bench_classification(paths, root, categories, repeat):
+    """Compare classify_path with the compiled CategoryClassifier on the same paths"""
+    result = {"paths": len(paths), "categories": len(categories)}
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            FolderScraper.classify_path(path, root, categories)
+    result["classify_path_seconds"] = round((time.perf_counter() - started) / repeat, 4)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        # Built once per search, like the engine does
+        classifier = FolderScraper.CategoryClassifier(categories, root)
+        for path in paths:
+            classifier.classify(path)
+    result["classifier_seconds"] = round((time.perf_counter() - started) / repeat, 4)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+class StubTreeview:
+    """Headless stand-in for ttk.Treeview with the calls the results view makes"""
+
+    def __init__(self, *args, **kwargs):
+        self._items = {}
+        self._order = []
+        self._selection = ()
+        self._next = 0
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def insert(self, parent, index, **options):
+        self._next += 1
+        item = f"I{self._next}"
+        self._items[item] = dict(options)
+        self._order.append(item)
+        return item
+
+    def item(self, item, option=None, **options):
+        if options:
+            self._items[item].update(options)
+            return None
+        if option:
+            return self._items[item].get(option)
+        return self._items[item]
+
+    def delete(self, item):
+        self._items.pop(item, None)
+        self._order.remove(item)
+
+    def selection(self):
+        return self._selection
+
+    def selection_set(self, item):
+        self._selection = (item,)
+
+    def selection_remove(self, *items):
+        self._selection = ()
+
+
+class StubScrollbar:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+class BenchSource:
+    """Result source for VirtualResultList backed by a ResultStore, like the app"""
+
+    def __init__(self, names):
+        self.names = names
+        self.results = FolderScraper.ResultStore()
+
+    def result_groups(self):
+        return [(name, self.results.group_size(name)) for name in self.names]
+
+    def result_row(self, group, index):
+        path = self.results.path(self.results.group_row(group, index))
+        return path, path
+
+
+def bench_rendering(result_count, group_count, visible_rows, ticks, use_tk):
+    """Time the virtualized results view: first render, scrolling and incremental ticks"""
+    names = [f"group_{index}" for index in range(group_count)]
+    source = BenchSource(names)
+
+    window = None
+    if use_tk:
+        window = FolderScraper.tk.Tk()
+        window.geometry("1000x700")
+        view = FolderScraper.VirtualResultList(window, source, 24)
+        view.tree.pack(fill="both", expand=True)
+        flush = window.update
+    else:
+        # Swap in the headless stand-ins while the view is created
+        real_ttk = FolderScraper.ttk
+        FolderScraper.ttk = types.SimpleNamespace(Treeview=StubTreeview, Scrollbar=StubScrollbar)
+        try:
+            view = FolderScraper.VirtualResultList(None, source, 24)
+        finally:
+            FolderScraper.ttk = real_ttk
+        flush = lambda: None
+    view.visible_rows = visible_rows
+
+    # Results arrive in ticks, like during a search
+    per_tick = max(1, result_count // ticks)
+    tick_times = []
+    added = 0
+    while added < result_count:
+        for index in range(added, min(result_count, added + per_tick)):
+            source.results.append(FolderScraper.SearchMatch(
+                f"/bench/folder_{index // 1000}/file_{index}.txt", names[index % group_count]))
+        added = min(result_count, added + per_tick)
+        started = time.perf_counter()
+        view.render()
+        flush()
+        tick_times.append(time.perf_counter() - started)
+
+    # Jump through the whole list like dragging the scrollbar
+    scroll_times = []
+    for step in range(100):
+        started = time.perf_counter()
+        view.on_scrollbar("moveto", step / 100)
+        flush()
+        scroll_times.append(time.perf_counter() - started)
+
+    if window is not None:
+        window.destroy()
+
+    return {
+        "backend": "tk" if use_tk else "headless stub",
+        "results": result_count,
+        "groups": group_count,
+        "first_tick_ms": round(tick_times[0] * 1000, 3),
+        "last_tick_ms": round(tick_times[-1] * 1000, 3),
+        "mean_tick_ms": round(sum(tick_times) / len(tick_times) * 1000, 3),
+        "mean_scroll_ms": round(sum(scroll_times) / len(scroll_times) * 1000, 3),
+        "result_store_mb": round(source.results.nbytes() / (1024 * 1024), 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def tk_available():
+    if FolderScraper.tk is None:
+        return False
+    if platform.system() == "Linux" and not os.environ.get("DISPLAY"):
+        return False
+    try:
+        FolderScraper.tk.Tk().destroy()
+        return True
+    except FolderScraper.tk.TclError:
+        return False
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark Folder Scraper on a synthetic folder tree.")
+    tree = parser.add_argument_group("synthetic tree")
+    tree.add_argument("--tree", help="benchmark an existing folder instead of generating one")
+    tree.add_argument("--depth", type=int, default=4, help="folder nesting depth (default: 4)")
+    tree.add_argument("--fanout", type=int, default=5, help="subfolders per folder (default: 5)")
+    tree.add_argument("--files", type=int, default=20, help="files per folder (default: 20)")
+    tree.add_argument("--name-length", type=int, default=12, help="mean name length (default: 12)")
+    tree.add_argument("--name-spread", type=float, default=4, help="standard deviation of name lengths (default: 4)")
+    tree.add_argument("--hit-rate", type=float, default=0.02,
+                      help="fraction of file names containing the keyword (default: 0.02)")
+    tree.add_argument("--symlink-loops", type=int, default=0, help="symlinks pointing back up the tree")
+    tree.add_argument("--unreadable", type=int, default=0, help="folders without read permission")
+    tree.add_argument("--seed", type=int, default=0, help="random seed, the same seed gives the same tree")
+    tree.add_argument("--keep-tree", action="store_true", help="don't delete the generated tree")
+
+    search = parser.add_argument_group("search")
+    search.add_argument("--keyword", default="report", help="keyword to search for (default: report)")
+    search.add_argument("--categories", type=int, default=20, help="number of categories (default: 20)")
+    search.add_argument("--max-depth", type=int, default=20, help="maximum search depth (default: 20)")
+    search.add_argument("--workers", type=int, nargs="+", default=[1], help="scanner thread counts to compare")
+    search.add_argument("--follow-symlinks", action="store_true", help="also benchmark following symlinks")
+    search.add_argument("--orders", nargs="+", choices=FolderScraper.ScanQueue.ORDERS,
+                        default=[FolderScraper.ScanQueue.DEFAULT_ORDER],
+                        help="scan orders to compare (default: depth)")
+    search.add_argument("--exclude", action="append", dest="excludes",
+                        help="gitignore-style exclude pattern, may be repeated")
+    search.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best is kept")
+
+    share = parser.add_argument_group("simulated network share")
+    share.add_argument("--latency-ms", type=float, default=0, help="added to every folder listing and stat call")
+    share.add_argument("--jitter-ms", type=float, default=0, help="random extra latency of up to this much")
+    share.add_argument("--error-rate", type=float, default=0, help="probability that a call fails")
+    share.add_argument("--hang-rate", type=float, default=0, help="probability that a folder listing hangs")
+    share.add_argument("--dir-timeout", type=float, help="seconds after which a folder listing is skipped")
+
+    render = parser.add_argument_group("rendering")
+    render.add_argument("--render-results", type=int, default=200000,
+                        help="results fed to the results view (default: 200000)")
+    render.add_argument("--render-ticks", type=int, default=50, help="UI ticks to deliver them in")
+    render.add_argument("--headless", action="store_true", help="use the headless stub even if Tk works")
+
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    categories = [f"cat{index:03d}" for index in range(args.categories)]
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "arguments": vars(args),
+    }
+
+    generated = None
+    if args.tree:
+        root = args.tree
+    else:
+        generated = tempfile.mkdtemp(prefix="folder_scraper_bench_")
+        root = generated
+        started = time.perf_counter()
+        report["tree"] = generate_tree(
+            root, depth=args.depth, fanout=args.fanout, files=args.files, name_length=args.name_length,
+            name_spread=args.name_spread, keyword=args.keyword, hit_rate=args.hit_rate, categories=categories,
+            symlink_loops=args.symlink_loops, unreadable=args.unreadable, seed=args.seed)
+        report["tree"]["generate_seconds"] = round(time.perf_counter() - started, 3)
+    report["tree_root"] = root
+
+    backend = None
+    if args.latency_ms or args.jitter_ms or args.error_rate or args.hang_rate:
+        # Seconds a hung listing blocks, long enough that only dir_timeout gets the search past it
+        backend = FolderScraper.SimulatedBackend(
+            latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, error_rate=args.error_rate,
+            hang_rate=args.hang_rate, hang_seconds=600, seed=args.seed)
+
+    try:
+        report["traversal"] = []
+        matches = []
+        for follow_symlinks in ([False, True] if args.follow_symlinks else [False]):
+            for workers in args.workers:
+                for order in args.orders:
+                    run, matches = bench_traversal(root, args.keyword, categories, args.max_depth,
+                                                   workers, follow_symlinks, args.repeat, order, args.excludes,
+                                                   backend, args.dir_timeout)
+                    report["traversal"].append(run)
+
+        report["classification"] = bench_classification(
+            [match.path for match in matches], root, categories, args.repeat)
+    finally:
+        if generated and not args.keep_tree:
+            unlock_tree(generated)
+            shutil.rmtree(generated, ignore_errors=True)
+
+    use_tk = not args.headless and tk_available()
+    report["rendering"] = bench_rendering(args.render_results, max(1, min(args.categories, 50)) + 1,
+                                          30, args.render_ticks, use_tk)
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())